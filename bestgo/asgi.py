@@ -2,6 +2,10 @@
 ASGI config for bestgo project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests to ``/services/stream`` are served by the server-sent event stream,
+everything else goes to Django. Stream clients authenticate with an Authorization
+header or a single-use ``ticket`` from ``/services/streamTicket``, so no bearer
+token ends up in access logs.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/asgi/
@@ -13,4 +17,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bestgo.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from services.streams import event_stream
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == '/services/stream':
+        return await event_stream(scope, receive, send)
+
+    return await django_application(scope, receive, send)
@@ -57,6 +57,13 @@ WSGI_APPLICATION = 'bestgo.wsgi.application'
 
 DATABASES = my_settings.DATABASES
 
+CACHES = getattr(my_settings, 'CACHES', {
+    'default': {
+        'BACKEND'  : 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION' : 'cache_table',
+    }
+})
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -111,6 +118,58 @@ CORS_ALLOW_HEADERS = (
     'x-csrftoken',
     'x-requested-with',
 )
+
+##MATCHING
+MATCHING_INDEX_TTL = 60
+MATCHING_TOP_K     = None
+
+MATCHING_JOB_TIMEOUT      = 300
+MATCHING_JOB_MAX_ATTEMPTS = 3
+
+SUBREGION_DISTANCE_CSV      = BASE_DIR / 'subregion_distances.csv'
+SUBREGION_DISTANCE_WEIGHT   = 2
+SUBREGION_DISTANCE_SCALE_KM = 10
+
+MASTER_DAILY_MATCH_CAP = None
+MASTER_OPEN_MATCH_CAP  = None
+
+REQUEST_DETAIL_CACHE_TTL = 300
+PRICING_METHOD_CACHE_TTL = 3600
+
+##AUTH
+AUTH_PRINCIPAL_CACHE_SIZE     = 10000
+AUTH_PRINCIPAL_TTL            = 30
+AUTH_TOKEN_CACHE_SIZE         = 10000
+AUTH_TOKEN_CACHE_TTL          = 300
+AUTH_ACCESS_TOKEN_LIFETIME    = 900
+AUTH_REFRESH_TOKEN_LIFETIME   = 1209600
+AUTH_REVOCATION_SYNC_INTERVAL = 30
+AUTH_ACCEPT_LEGACY_TOKENS     = False
+PASSWORD_HASH_ROUNDS          = 12
+PASSWORD_HASH_WORKERS         = 4
+
+##RATE LIMITS (capacity, seconds to refill it)
+RATE_LIMIT_BACKEND         = 'users.ratelimit.LocalBucketBackend'
+RATE_LIMIT_TRUST_FORWARDED = False
+RATE_LIMITS                = {
+    'signin'         : {'ip': (20, 60), 'email': (10, 300)},
+    'signup'         : {'ip': (10, 60)},
+    'password_reset' : {'ip': (5, 60), 'email': (3, 3600)},
+}
+
+##QUOTATION IMAGES
+QUOTATION_IMAGE_STORAGE         = 'services.storage.LocalStorage'
+QUOTATION_IMAGE_STORAGE_OPTIONS = {'root': BASE_DIR / 'media', 'base_url': '/media'}
+QUOTATION_IMAGE_MAX_SIZE        = 10 * 1024 * 1024
+QUOTATION_THUMBNAIL_SIZE        = (320, 320)
+QUOTATION_THUMBNAIL_WORKERS     = 4
+
+##EVENTS
+EVENT_BROKER_BACKEND   = 'services.events.DatabaseBackend'
+EVENT_POLL_INTERVAL    = 0.5
+EVENT_RETENTION        = 300
+EVENT_STREAM_HEARTBEAT = 15
+EVENT_TICKET_LIFETIME  = 30
  
 EMAIL_BACKEND       = my_settings.EMAIL['EMAIL_BACKEND']
 EMAIL_USE_TLS       = my_settings.EMAIL['EMAIL_USE_TLS']
@@ -0,0 +1,24 @@
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+def cache_get(key, default=None):
+    try:
+        return cache.get(key, default)
+    except Exception:
+        logger.exception('cache get failed: %s', key)
+        return default
+
+def cache_set(key, value, timeout):
+    try:
+        cache.set(key, value, timeout)
+    except Exception:
+        logger.exception('cache set failed: %s', key)
+
+def cache_delete_many(keys):
+    try:
+        cache.delete_many(keys)
+    except Exception:
+        logger.exception('cache delete failed: %s', keys)
@@ -0,0 +1,19 @@
+from django.conf        import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+
+    return [Warning(
+        'The default cache is local to each process.',
+        hint = 'Request details and pricing methods are invalidated from other processes; '
+               'configure a shared CACHES backend such as memcached or the database cache.',
+        id   = 'services.W001',
+    )]
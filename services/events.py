@@ -0,0 +1,196 @@
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime    import timedelta
+
+from django.conf                 import settings
+from django.db                   import transaction, connection, DatabaseError
+from django.db.models            import Max
+from django.utils                import timezone
+from django.utils.module_loading import import_string
+
+from services.models import Event
+
+class LocalBackend:
+    """
+    In-process stand-in for a shared pub/sub backend.
+    Every broker attached to the same backend receives every message, the way nodes
+    subscribed to one Redis channel would.
+    """
+    def __init__(self):
+        self.brokers = []
+
+    def attach(self, broker):
+        self.brokers.append(broker)
+
+    def publish(self, channel, message):
+        for broker in list(self.brokers):
+            broker.deliver(channel, message)
+
+    def publish_many(self, messages):
+        for channel, message in messages:
+            self.publish(channel, message)
+
+    def start(self):
+        pass
+
+class DatabaseBackend:
+    """
+    Pub/sub across processes through the events table.
+    publish() inserts a row. The first subscription in a process starts a thread that polls for
+    new rows and hands them to the attached brokers. Matching workers only publish, so they never poll.
+    Ids can commit out of order, so every poll re-reads the last GAP ids and skips rows already delivered.
+    Publishers and pollers both delete rows older than the retention, so the table stays bounded
+    even when no process streams.
+    """
+    GAP = 100
+
+    def __init__(self):
+        self.interval  = getattr(settings, 'EVENT_POLL_INTERVAL', 0.5)
+        self.retention = getattr(settings, 'EVENT_RETENTION', 300)
+        self.brokers   = []
+        self.floor     = None
+        self.seen      = set()
+        self.thread    = None
+        self.stopped   = threading.Event()
+        self.lock      = threading.Lock()
+        self.pruned    = time.monotonic()
+
+    def attach(self, broker):
+        self.brokers.append(broker)
+
+    def publish(self, channel, message):
+        self.publish_many([(channel, message)])
+
+    def publish_many(self, messages):
+        Event.objects.bulk_create([Event(channel=channel, payload=message) for channel, message in messages])
+        self.maybe_prune()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='event-poller', daemon=True)
+                self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+
+    def poll(self):
+        if self.floor is None:
+            self.floor = Event.objects.aggregate(last=Max('id'))['last'] or 0
+
+        rows = Event.objects.filter(id__gt=self.floor).order_by('id').values_list('id', 'channel', 'payload')
+        for event_id, channel, payload in rows:
+            if event_id in self.seen:
+                continue
+            self.seen.add(event_id)
+            for broker in list(self.brokers):
+                broker.deliver(channel, payload)
+
+        if self.seen:
+            self.floor = max(self.floor, max(self.seen)-self.GAP)
+            self.seen  = {event_id for event_id in self.seen if event_id > self.floor}
+
+    def prune(self):
+        Event.objects.filter(created_at__lt=timezone.now()-timedelta(seconds=self.retention)).delete()
+
+    def maybe_prune(self):
+        with self.lock:
+            if time.monotonic()-self.pruned <= self.retention/10:
+                return
+            self.pruned = time.monotonic()
+        self.prune()
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                try:
+                    self.poll()
+                    self.maybe_prune()
+                except DatabaseError:
+                    connection.close()
+                self.stopped.wait(self.interval)
+        finally:
+            connection.close()
+
+class Subscription:
+    def __init__(self, broker, channels, maxsize):
+        self.broker   = broker
+        self.channels = channels
+        self.loop     = asyncio.get_running_loop()
+        self.queue    = asyncio.Queue(maxsize=maxsize)
+
+    def push(self, message):
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+    async def get(self):
+        return json.loads(await self.queue.get())
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class Broker:
+    def __init__(self, backend, queue_size=100):
+        self.backend     = backend
+        self.queue_size  = queue_size
+        self.subscribers = defaultdict(set)
+        self.lock        = threading.Lock()
+        backend.attach(self)
+
+    def publish(self, channel, event):
+        self.backend.publish(channel, json.dumps(event, default=str))
+
+    def publish_many(self, events):
+        self.backend.publish_many([(channel, json.dumps(event, default=str)) for channel, event in events])
+
+    def deliver(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(channel, ()))
+
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.push, message)
+
+    def subscribe(self, channels):
+        self.backend.start()
+        subscription = Subscription(self, channels, self.queue_size)
+        with self.lock:
+            for channel in channels:
+                self.subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscribers[channel].discard(subscription)
+                if not self.subscribers[channel]:
+                    del self.subscribers[channel]
+
+_broker      = None
+_broker_lock = threading.Lock()
+
+def get_broker():
+    global _broker
+
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                backend = import_string(getattr(settings, 'EVENT_BROKER_BACKEND', 'services.events.DatabaseBackend'))
+                _broker = Broker(backend())
+
+    return _broker
+
+def master_channel(master_id):
+    return f'master:{master_id}'
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+def publish_on_commit(events):
+    events = list(events)
+    if events:
+        transaction.on_commit(lambda: get_broker().publish_many(events))
@@ -0,0 +1,67 @@
+import time
+from datetime import timedelta
+
+from django.conf      import settings
+from django.db        import transaction, connection
+from django.db.models import F, Q
+from django.utils     import timezone
+
+from services.models   import MatchingJob
+from services.matching import match_request
+
+def enqueue_matching(which_request):
+    return MatchingJob.objects.create(request=which_request)
+
+def claim_jobs(batch_size):
+    timeout      = getattr(settings, 'MATCHING_JOB_TIMEOUT', 300)
+    max_attempts = getattr(settings, 'MATCHING_JOB_MAX_ATTEMPTS', 3)
+    now          = timezone.now()
+    stale        = Q(status=MatchingJob.RUNNING, started_at__lt=now-timedelta(seconds=timeout))
+
+    with transaction.atomic():
+        MatchingJob.objects.filter(stale, attempts__gte=max_attempts).update(
+            status      = MatchingJob.FAILED,
+            error       = 'TIMED_OUT',
+            finished_at = now,
+        )
+        job_ids = list(
+            MatchingJob.objects.select_for_update(skip_locked=True)
+                               .filter(Q(status=MatchingJob.PENDING) | stale & Q(attempts__lt=max_attempts))
+                               .order_by('id')
+                               .values_list('id', flat=True)[:batch_size]
+        )
+        MatchingJob.objects.filter(id__in=job_ids).update(
+            status     = MatchingJob.RUNNING,
+            started_at = now,
+            attempts   = F('attempts')+1,
+        )
+
+    return job_ids
+
+def run_job(job_id):
+    max_attempts = getattr(settings, 'MATCHING_JOB_MAX_ATTEMPTS', 3)
+    job          = MatchingJob.objects.select_related('request__subregion').get(id=job_id)
+    start        = time.perf_counter()
+
+    try:
+        job.matched = match_request(job.request)
+        job.status  = MatchingJob.DONE
+        job.error   = None
+    except Exception as error:
+        job.status = MatchingJob.PENDING if job.attempts < max_attempts else MatchingJob.FAILED
+        job.error  = repr(error)[:200]
+
+    job.latency_ms  = int((time.perf_counter()-start)*1000)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'matched', 'error', 'latency_ms', 'finished_at'])
+
+    return job
+
+def run_job_in_thread(job_id):
+    try:
+        return run_job(job_id)
+    finally:
+        connection.close()
+
+def run_pending(batch_size=100):
+    return [run_job(job_id) for job_id in claim_jobs(batch_size)]
@@ -0,0 +1,191 @@
+import json
+import logging
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db                   import connection, transaction
+from django.test.utils           import CaptureQueriesContext
+from django.utils                import timezone
+
+from services.models   import Category, Service, Request, RequestMasterMatch
+from services.matching import match_request, invalidate_index
+from users.models      import User, Master, MasterService, Region, SubRegion, Gender
+
+def bulk_insert(model, objects, batch):
+    chunk = []
+    count = 0
+    for instance in objects:
+        chunk.append(instance)
+        if len(chunk) >= batch:
+            model.objects.bulk_create(chunk)
+            count += len(chunk)
+            chunk  = []
+
+    model.objects.bulk_create(chunk)
+    return count+len(chunk)
+
+def percentile(values, rank):
+    if not values:
+        return 0
+
+    ordered = sorted(values)
+    return ordered[min(len(ordered)-1, int(len(ordered) * rank / 100))]
+
+class Command(BaseCommand):
+
+        help = 'This Command Generates A Synthetic Master Population And Benchmarks Request Matching, Rolling It Back Afterwards'
+
+        def add_arguments(self, parser):
+            parser.add_argument(
+                "-masters", default=10000, type=int, help = "How many masters do you want to create?"
+            )
+            parser.add_argument(
+                "-services", default=20, type=int, help = "How many services do you want to create?"
+            )
+            parser.add_argument(
+                "-regions", default=17, type=int, help = "How many regions do you want to create?"
+            )
+            parser.add_argument(
+                "-subregions", default=15, type=int, help = "How many subregions per region?"
+            )
+            parser.add_argument(
+                "-services_per_master", default=3, type=int, help = "At most how many services per master?"
+            )
+            parser.add_argument(
+                "-requests", default=100, type=int, help = "How many match operations do you want to replay?"
+            )
+            parser.add_argument(
+                "-top_k", default=None, type=int, help = "Top-K fan-out used while matching"
+            )
+            parser.add_argument(
+                "-batch", default=5000, type=int, help = "Rows per bulk insert"
+            )
+            parser.add_argument(
+                "-seed", default=0, type=int, help = "Random seed"
+            )
+            parser.add_argument(
+                "-keep", action="store_true", help = "Keep the generated rows instead of rolling them back"
+            )
+            parser.add_argument(
+                "-output", default=None, type=str, help = "Where to write the JSON report (stdout by default)"
+            )
+
+        def handle(self, *args, **options):
+            sql_logger = logging.getLogger('django.db.backends')
+            sql_level  = sql_logger.level
+            sql_logger.setLevel(logging.WARNING)
+
+            try:
+                with transaction.atomic():
+                    report = self.run(options)
+                    transaction.set_rollback(not options['keep'])
+            finally:
+                sql_logger.setLevel(sql_level)
+
+            output = json.dumps(report, indent=2, sort_keys=True)
+            if options['output']:
+                with open(options['output'], 'w') as out_file:
+                    out_file.write(output+'\n')
+                self.stdout.write(self.style.SUCCESS(f"report written to {options['output']}"))
+            else:
+                self.stdout.write(output)
+
+        def run(self, options):
+            rng    = random.Random(options['seed'])
+            batch  = options['batch']
+            prefix = f"bench{int(time.time())}"
+
+            start       = time.perf_counter()
+            genders     = [Gender.objects.get_or_create(name=name)[0].id for name in ('남자', '여자')]
+            category    = Category.objects.create(name=f'{prefix}-category')
+            Service.objects.bulk_create([
+                Service(category=category, name=f'{prefix}-service-{i}') for i in range(options['services'])
+            ])
+            service_ids = list(Service.objects.filter(category=category).values_list('id', flat=True))
+
+            Region.objects.bulk_create([
+                Region(name=f'{prefix}-region-{i}') for i in range(options['regions'])
+            ])
+            region_ids = Region.objects.filter(name__startswith=f'{prefix}-region-').values_list('id', flat=True)
+            SubRegion.objects.bulk_create([
+                SubRegion(region_id=region_id, name=f'{prefix}-subregion-{region_id}-{i}')
+                for region_id in region_ids for i in range(options['subregions'])
+            ])
+            subregion_ids = list(SubRegion.objects.filter(region_id__in=region_ids).values_list('id', flat=True))
+
+            bulk_insert(User, (
+                User(
+                    name      = f'master{i}',
+                    email     = f'{prefix}-{i}@bestgo.test',
+                    password  = 'benchmark',
+                    is_master = True,
+                    gender_id = rng.choice(genders),
+                ) for i in range(options['masters'])
+            ), batch)
+            user_ids  = User.objects.filter(email__startswith=f'{prefix}-').order_by('id').values_list('id', flat=True)
+            birthdate = timezone.now().date()-timedelta(days=365*30)
+            masters   = bulk_insert(Master, (
+                Master(user_id=user_id, birthdate=birthdate, subregions_id=rng.choice(subregion_ids))
+                for user_id in user_ids.iterator()
+            ), batch)
+
+            per_master      = min(options['services_per_master'], len(service_ids))
+            master_ids      = Master.objects.filter(user__email__startswith=f'{prefix}-').order_by('id').values_list('id', flat=True)
+            master_services = bulk_insert(MasterService, (
+                MasterService(master_id=master_id, service_id=service_id, is_main=(i == 0))
+                for master_id in master_ids.iterator()
+                for i, service_id in enumerate(rng.sample(service_ids, rng.randint(1, per_master)))
+            ), batch)
+
+            requester = User.objects.create(name='requester', email=f'{prefix}@bestgo.test', password='benchmark')
+            bulk_insert(Request, (
+                Request(
+                    user         = requester,
+                    service_id   = rng.choice(service_ids),
+                    subregion_id = rng.choice(subregion_ids),
+                    expired_at   = timezone.now()+timedelta(days=7),
+                ) for _ in range(options['requests'])
+            ), batch)
+            generate_seconds = time.perf_counter()-start
+
+            invalidate_index()
+            latencies    = []
+            query_counts = []
+            rows_written = 0
+            for which_request in Request.objects.filter(user=requester).select_related('subregion').order_by('id'):
+                with CaptureQueriesContext(connection) as queries:
+                    started       = time.perf_counter()
+                    rows_written += match_request(which_request, top_k=options['top_k'])
+                    latencies.append((time.perf_counter()-started)*1000)
+                query_counts.append(len(queries))
+
+            return {
+                'config'  : {key: options[key] for key in (
+                    'masters', 'services', 'regions', 'subregions', 'services_per_master', 'requests', 'top_k', 'seed'
+                )},
+                'dataset' : {
+                    'masters'          : masters,
+                    'master_services'  : master_services,
+                    'subregions'       : len(subregion_ids),
+                    'generate_seconds' : round(generate_seconds, 3),
+                },
+                'match'   : {
+                    'operations'   : len(latencies),
+                    'rows_written' : rows_written,
+                    'match_rows'   : RequestMasterMatch.objects.filter(request__user=requester).count(),
+                    'latency_ms'   : {
+                        'mean' : round(sum(latencies)/len(latencies), 3) if latencies else 0,
+                        'p50'  : round(percentile(latencies, 50), 3),
+                        'p90'  : round(percentile(latencies, 90), 3),
+                        'p99'  : round(percentile(latencies, 99), 3),
+                        'max'  : round(max(latencies, default=0), 3),
+                    },
+                    'queries'      : {
+                        'total' : sum(query_counts),
+                        'mean'  : round(sum(query_counts)/len(query_counts), 3) if query_counts else 0,
+                        'max'   : max(query_counts, default=0),
+                    },
+                },
+            }
@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from services.jobs   import claim_jobs, run_job_in_thread
+from services.models import MatchingJob
+from users.capacity  import rebuild_open_matches
+
+class Command(BaseCommand):
+
+        help = 'This Command Runs Workers That Match Masters To Queued Requests'
+
+        def add_arguments(self, parser):
+            parser.add_argument(
+                "-workers", default=4, type=int, help = "How many worker threads should run?"
+            )
+            parser.add_argument(
+                "-batch", default=20, type=int, help = "How many jobs should be claimed at once?"
+            )
+            parser.add_argument(
+                "-poll", default=1.0, type=float, help = "How many seconds to wait when the queue is empty?"
+            )
+            parser.add_argument(
+                "-sweep", default=60.0, type=float, help = "How many seconds between open match recounts?"
+            )
+            parser.add_argument(
+                "-once", action="store_true", help = "Exit when the queue is empty"
+            )
+
+        def handle(self, *args, **options):
+            workers = options.get("workers")
+            batch   = options.get("batch")
+            poll    = options.get("poll")
+            once    = options.get("once")
+            sweep   = options.get("sweep")
+            swept   = time.monotonic()
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                while True:
+                    if time.monotonic()-swept > sweep:
+                        rebuild_open_matches()
+                        swept = time.monotonic()
+
+                    job_ids = claim_jobs(batch)
+
+                    if not job_ids:
+                        if once:
+                            break
+                        time.sleep(poll)
+                        continue
+
+                    for job in pool.map(run_job_in_thread, job_ids):
+                        message = f'job {job.id} request {job.request_id} {job.status} matched={job.matched} latency={job.latency_ms}ms'
+                        if job.status == MatchingJob.DONE:
+                            self.stdout.write(self.style.SUCCESS(message))
+                        else:
+                            self.stdout.write(self.style.ERROR(f'{message} error={job.error}'))
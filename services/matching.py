@@ -0,0 +1,251 @@
+import heapq
+import threading
+import time
+from array import array
+
+from django.conf      import settings
+from django.db        import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils     import timezone
+
+from services.models    import Request, RequestMasterMatch, SelectedChoice
+from services.events    import publish_on_commit, master_channel
+from services.summaries import invalidate_request_detail
+from users.models       import MasterService, Gender
+from users.distances    import get_distance_table
+from users.capacity     import saturated_masters, remaining_capacity, record_matches
+from users.badges       import add_new_requests
+
+GENDER_QUESTION_ID = 2
+
+SUBREGION_POINT = 2
+REGION_POINT    = 1
+MAIN_POINT      = 1
+GENDER_POINT    = 1
+
+def points(same_subregion, same_region, is_main, same_gender, proximity=0):
+    return (
+        SUBREGION_POINT * same_subregion
+        + REGION_POINT * same_region
+        + MAIN_POINT * is_main
+        + GENDER_POINT * same_gender
+        + (0 if same_subregion else proximity)
+    )
+
+class CandidateIndex:
+    """
+    Column oriented snapshot of every master offering one service.
+    Each column is a compact array aligned by position, ordered by MasterService id.
+    """
+    __slots__ = ('service_id', 'master_ids', 'subregion_ids', 'region_ids', 'is_main', 'gender_ids', 'built_at')
+
+    def __init__(self, service_id, rows):
+        self.service_id    = service_id
+        self.master_ids    = array('l')
+        self.subregion_ids = array('l')
+        self.region_ids    = array('l')
+        self.is_main       = array('b')
+        self.gender_ids    = array('l')
+        self.built_at      = time.monotonic()
+
+        for master_id, subregion_id, region_id, is_main, gender_id in rows:
+            self.master_ids.append(master_id)
+            self.subregion_ids.append(subregion_id)
+            self.region_ids.append(region_id)
+            self.is_main.append(is_main)
+            self.gender_ids.append(gender_id or 0)
+
+    @classmethod
+    def build(cls, service_id):
+        rows = MasterService.objects.filter(service_id=service_id)\
+                                    .order_by('id')\
+                                    .values_list(
+                                        'master_id',
+                                        'master__subregions_id',
+                                        'master__subregions__region_id',
+                                        'is_main',
+                                        'master__user__gender_id',
+                                    )
+        return cls(service_id, rows)
+
+    def __len__(self):
+        return len(self.master_ids)
+
+    def is_stale(self, ttl):
+        return time.monotonic() - self.built_at > ttl
+
+    def score(self, subregion_id, region_id, gender_id):
+        table = get_distance_table()
+
+        return array('l', (
+            points(
+                subregion == subregion_id,
+                region == region_id,
+                main,
+                gender_id is not None and gender == gender_id,
+                table.points(subregion_id, subregion),
+            ) for subregion, region, main, gender in zip(
+                self.subregion_ids, self.region_ids, self.is_main, self.gender_ids
+            )
+        ))
+
+_indexes      = {}
+_indexes_lock = threading.Lock()
+
+def get_index(service_id):
+    ttl   = getattr(settings, 'MATCHING_INDEX_TTL', 60)
+    index = _indexes.get(service_id)
+
+    if index is None or index.is_stale(ttl):
+        index = CandidateIndex.build(service_id)
+        with _indexes_lock:
+            _indexes[service_id] = index
+
+    return index
+
+def invalidate_index(service_ids=None):
+    with _indexes_lock:
+        if service_ids is None:
+            _indexes.clear()
+            return
+
+        for service_id in service_ids:
+            _indexes.pop(service_id, None)
+
+def preferred_gender_id(which_request):
+    return Gender.objects.filter(
+        name__in = which_request.choices.filter(question_id=GENDER_QUESTION_ID).values('choice')
+    ).values_list('id', flat=True).first()
+
+def select_top(index, scores, top_k, positions):
+    if top_k is None or top_k >= len(positions):
+        return list(positions)
+
+    return heapq.nlargest(top_k, positions, key=lambda i: (scores[i], -index.master_ids[i]))
+
+def match_request(which_request, top_k=None):
+    if top_k is None:
+        top_k = getattr(settings, 'MATCHING_TOP_K', None)
+
+    with transaction.atomic():
+        distributed_at = Request.objects.select_for_update()\
+                                        .filter(id=which_request.id)\
+                                        .values_list('distributed_at', flat=True)\
+                                        .first()
+        if distributed_at is not None:
+            return 0
+
+        index  = get_index(which_request.service_id)
+        scores = index.score(
+            which_request.subregion_id,
+            which_request.subregion.region_id,
+            preferred_gender_id(which_request),
+        )
+
+        existing  = set(RequestMasterMatch.objects.filter(request_id=which_request.id).values_list('master_id', flat=True))
+        saturated = saturated_masters()
+        positions = [
+            i for i, master_id in enumerate(index.master_ids)
+            if master_id not in saturated and master_id not in existing
+        ]
+        selected  = select_top(index, scores, None if top_k is None else max(top_k-len(existing), 0), positions)
+        RequestMasterMatch.objects.bulk_create([
+            RequestMasterMatch(
+                request_id         = which_request.id,
+                master_id          = index.master_ids[i],
+                priority           = scores[i],
+                request_created_at = which_request.created_at,
+            ) for i in selected
+        ], ignore_conflicts=True)
+        record_matches([index.master_ids[i] for i in selected])
+        add_new_requests([index.master_ids[i] for i in selected])
+        Request.objects.filter(id=which_request.id).update(distributed_at=timezone.now())
+        invalidate_request_detail([which_request.id])
+        publish_on_commit(
+            (master_channel(index.master_ids[i]), {'type': 'match', 'requestId': which_request.id, 'priority': scores[i]})
+            for i in selected
+        )
+
+    return len(selected)
+
+def match_master(master_id, top_k=None):
+    if top_k is None:
+        top_k = getattr(settings, 'MATCHING_TOP_K', None)
+
+    with transaction.atomic():
+        rows = MasterService.objects.filter(master_id=master_id).values_list(
+            'service_id',
+            'is_main',
+            'master__subregions_id',
+            'master__subregions__region_id',
+            'master__user__gender__name',
+        )
+        if not rows:
+            return 0
+
+        services = {service_id: is_main for service_id, is_main, *_ in rows}
+        _, _, subregion_id, region_id, gender_name = rows[0]
+        invalidate_index(services)
+
+        preferred_gender = SelectedChoice.objects.filter(
+            request_id          = OuterRef('pk'),
+            choice__question_id = GENDER_QUESTION_ID,
+        ).values('choice__choice')[:1]
+        table         = get_distance_table()
+        candidates    = Request.objects.filter(
+            Q(subregion__region_id=region_id) | Q(subregion_id__in=table.nearby(subregion_id)),
+            service_id__in    = services,
+            expired_at__gt    = timezone.now(),
+            closed_at__isnull = True,
+        )
+        locked_ids    = list(candidates.select_for_update().order_by('id').values_list('id', flat=True))
+        open_requests = Request.objects.filter(id__in=locked_ids).annotate(
+            preferred_gender = Subquery(preferred_gender),
+            matched          = Count('requestmastermatch'),
+        ).values_list('id', 'service_id', 'subregion_id', 'subregion__region_id', 'preferred_gender', 'matched', 'created_at')
+
+        scores      = {}
+        is_full     = set()
+        created_ats = {}
+        for request_id, service_id, subregion, region, preferred, matched, created_at in open_requests:
+            created_ats[request_id] = created_at
+            scores[request_id] = points(
+                subregion == subregion_id,
+                region == region_id,
+                services[service_id],
+                gender_name is not None and preferred == gender_name,
+                table.points(subregion, subregion_id),
+            )
+            if top_k is not None and matched >= top_k:
+                is_full.add(request_id)
+
+        to_update = list(RequestMasterMatch.objects.filter(master_id=master_id, request_id__in=scores))
+        for match in to_update:
+            match.priority = scores[match.request_id]
+
+        matched_ids = {match.request_id for match in to_update}
+        to_create   = sorted((
+            RequestMasterMatch(
+                request_id         = request_id,
+                master_id          = master_id,
+                priority           = priority,
+                request_created_at = created_ats[request_id],
+            ) for request_id, priority in scores.items()
+            if request_id not in matched_ids and request_id not in is_full
+        ), key=lambda match: (-match.priority, match.request_id))
+
+        remaining = remaining_capacity(master_id)
+        if remaining is not None:
+            to_create = to_create[:remaining]
+
+        RequestMasterMatch.objects.bulk_update(to_update, ['priority'])
+        RequestMasterMatch.objects.bulk_create(to_create, ignore_conflicts=True)
+        record_matches([master_id] * len(to_create))
+        add_new_requests([master_id] * len(to_create))
+        invalidate_request_detail(match.request_id for match in to_create)
+        publish_on_commit(
+            (master_channel(master_id), {'type': 'match', 'requestId': match.request_id, 'priority': match.priority})
+            for match in to_create
+        )
+
+    return len(to_create)+len(to_update)
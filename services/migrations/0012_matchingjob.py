@@ -0,0 +1,36 @@
+# Generated by Django 3.1.5 on 2026-10-18 08:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0011_auto_20210203_1349'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchingJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('matched', models.PositiveIntegerField(default=0)),
+                ('latency_ms', models.PositiveIntegerField(null=True)),
+                ('error', models.CharField(max_length=200, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(null=True)),
+                ('finished_at', models.DateTimeField(null=True)),
+                ('request', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='services.request')),
+            ],
+            options={
+                'db_table': 'matching_jobs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='matchingjob',
+            index=models.Index(fields=['status', 'id'], name='matching_jo_status_6b3e07_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.1.5 on 2026-10-18 08:51
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_matches(apps, schema_editor):
+    RequestMasterMatch = apps.get_model('services', 'RequestMasterMatch')
+    Quotation          = apps.get_model('services', 'Quotation')
+    Request            = apps.get_model('services', 'Request')
+
+    duplicates = RequestMasterMatch.objects.values('request_id', 'master_id')\
+                                           .annotate(keep=Min('id'), total=Count('id'))\
+                                           .filter(total__gt=1)
+    for duplicate in duplicates:
+        extra = RequestMasterMatch.objects.filter(
+            request_id = duplicate['request_id'],
+            master_id  = duplicate['master_id'],
+        ).exclude(id=duplicate['keep'])
+        Quotation.objects.filter(match__in=extra).update(match_id=duplicate['keep'])
+        extra.delete()
+
+    Request.objects.filter(requestmastermatch__isnull=False).update(distributed_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0012_matchingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='distributed_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(merge_duplicate_matches, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='requestmastermatch',
+            constraint=models.UniqueConstraint(fields=('request', 'master'), name='unique_request_master'),
+        ),
+    ]
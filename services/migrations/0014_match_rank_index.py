@@ -0,0 +1,33 @@
+# Generated by Django 3.1.5 on 2026-10-18 08:53
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_request_created_at(apps, schema_editor):
+    RequestMasterMatch = apps.get_model('services', 'RequestMasterMatch')
+    Request            = apps.get_model('services', 'Request')
+
+    RequestMasterMatch.objects.update(request_created_at=Subquery(
+        Request.objects.filter(id=OuterRef('request_id')).values('created_at')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0013_unique_request_master'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='requestmastermatch',
+            name='request_created_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(copy_request_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='requestmastermatch',
+            index=models.Index(fields=['master', '-priority', '-request_created_at'], name='match_master_rank_idx'),
+        ),
+    ]
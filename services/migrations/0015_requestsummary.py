@@ -0,0 +1,51 @@
+# Generated by Django 3.1.5 on 2026-10-18 08:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def summarize_requests(apps, schema_editor):
+    Request        = apps.get_model('services', 'Request')
+    RequestSummary = apps.get_model('services', 'RequestSummary')
+
+    requests  = Request.objects.select_related('user', 'service', 'subregion__region')\
+                               .prefetch_related('selectedchoice_set__choice__question')
+    summaries = [
+        RequestSummary(
+            request         = request,
+            service_name    = request.service.name if request.service else None,
+            region_name     = request.subregion.region.name+' '+request.subregion.name,
+            choices         = [
+                {'question': selected.choice.question.name, 'choice': selected.choice.choice}
+                for selected in request.selectedchoice_set.all() if selected.choice
+            ],
+            requester_name  = request.user.name,
+            requester_image = request.user.profile_image,
+        ) for request in requests
+    ]
+    RequestSummary.objects.bulk_create(summaries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0014_match_rank_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestSummary',
+            fields=[
+                ('request', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='services.request')),
+                ('service_name', models.CharField(max_length=100, null=True)),
+                ('region_name', models.CharField(max_length=201)),
+                ('choices', models.JSONField(default=list)),
+                ('requester_name', models.CharField(max_length=45)),
+                ('requester_image', models.URLField(max_length=2000, null=True)),
+            ],
+            options={
+                'db_table': 'request_summaries',
+            },
+        ),
+        migrations.RunPython(summarize_requests, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.5 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0015_requestsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quotationimage',
+            name='thumbnail_url',
+            field=models.URLField(max_length=2000, null=True),
+        ),
+    ]
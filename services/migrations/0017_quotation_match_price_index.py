@@ -0,0 +1,17 @@
+# Generated by Django 3.1.5 on 2026-10-18 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0016_quotationimage_thumbnail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['match', 'price'], name='quotation_match_price_idx'),
+        ),
+    ]
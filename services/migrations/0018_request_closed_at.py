@@ -0,0 +1,18 @@
+# Generated by Django 3.1.5 on 2026-10-18 09:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0017_quotation_match_price_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='request',
+            name='closed_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
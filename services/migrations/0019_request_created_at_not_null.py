@@ -0,0 +1,29 @@
+# Generated by Django 3.1.5 on 2026-10-18 10:02
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_missing_request_created_at(apps, schema_editor):
+    RequestMasterMatch = apps.get_model('services', 'RequestMasterMatch')
+    Request            = apps.get_model('services', 'Request')
+
+    RequestMasterMatch.objects.filter(request_created_at=None).update(request_created_at=Subquery(
+        Request.objects.filter(id=OuterRef('request_id')).values('created_at')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0018_request_closed_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_missing_request_created_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='requestmastermatch',
+            name='request_created_at',
+            field=models.DateTimeField(),
+        ),
+    ]
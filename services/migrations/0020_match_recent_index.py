@@ -0,0 +1,17 @@
+# Generated by Django 3.1.5 on 2026-10-18 10:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0019_request_created_at_not_null'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='requestmastermatch',
+            index=models.Index(fields=['master', '-request_created_at', '-id'], name='match_master_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.1.5 on 2026-10-18 10:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0021_event'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='quotation',
+            name='quotation_match_price_idx',
+        ),
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['match', 'id'], name='quotation_match_first_idx'),
+        ),
+    ]
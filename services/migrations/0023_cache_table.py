@@ -0,0 +1,19 @@
+# Generated by Django 3.1.5 on 2026-10-18 10:52
+
+from django.core.management import call_command
+from django.db              import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0022_quotation_match_first_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
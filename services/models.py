@@ -16,17 +16,30 @@ class Service(models.Model):
         db_table = "services"
 
 class Request(models.Model):
-    user       = models.ForeignKey('users.User', on_delete=models.CASCADE)
-    service    = models.ForeignKey('Service', on_delete=models.SET_NULL, null=True)
-    subregion  = models.ForeignKey('users.SubRegion', on_delete=models.CASCADE)
-    expired_at = models.DateTimeField()
-    created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
-    choices    = models.ManyToManyField('QuestionChoice', related_name= 'made_choices', through='SelectedChoice')
+    user           = models.ForeignKey('users.User', on_delete=models.CASCADE)
+    service        = models.ForeignKey('Service', on_delete=models.SET_NULL, null=True)
+    subregion      = models.ForeignKey('users.SubRegion', on_delete=models.CASCADE)
+    expired_at     = models.DateTimeField()
+    created_at     = models.DateTimeField(auto_now_add=True)
+    updated_at     = models.DateTimeField(auto_now=True)
+    distributed_at = models.DateTimeField(null=True)
+    closed_at      = models.DateTimeField(null=True)
+    choices        = models.ManyToManyField('QuestionChoice', related_name= 'made_choices', through='SelectedChoice')
 
     class Meta:
         db_table = "requests"
 
+class RequestSummary(models.Model):
+    request         = models.OneToOneField('Request', primary_key=True, related_name='summary', on_delete=models.CASCADE)
+    service_name    = models.CharField(max_length=100, null=True)
+    region_name     = models.CharField(max_length=201)
+    choices         = models.JSONField(default=list)
+    requester_name  = models.CharField(max_length=45)
+    requester_image = models.URLField(max_length=2000, null=True)
+
+    class Meta:
+        db_table = "request_summaries"
+
 class Question(models.Model):
     name = models.CharField(max_length=200)
 
@@ -48,12 +61,25 @@ class SelectedChoice(models.Model):
         db_table = "selected_choices"
 
 class RequestMasterMatch(models.Model):
-    request  = models.ForeignKey('Request', on_delete=models.CASCADE)
-    master   = models.ForeignKey('users.Master', on_delete=models.CASCADE)
-    priority = models.PositiveSmallIntegerField(default=1)
+    request            = models.ForeignKey('Request', on_delete=models.CASCADE)
+    master             = models.ForeignKey('users.Master', on_delete=models.CASCADE)
+    priority           = models.PositiveSmallIntegerField(default=1)
+    request_created_at = models.DateTimeField()
 
     class Meta:
-        db_table = "request_master_matches"
+        db_table    = "request_master_matches"
+        constraints = [
+            models.UniqueConstraint(fields=['request', 'master'], name='unique_request_master'),
+        ]
+        indexes     = [
+            models.Index(fields=['master', '-priority', '-request_created_at'], name='match_master_rank_idx'),
+            models.Index(fields=['master', '-request_created_at', '-id'], name='match_master_recent_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.request_created_at is None:
+            self.request_created_at = self.request.created_at
+        super().save(*args, **kwargs)
 
 class Quotation(models.Model):
     match          = models.ForeignKey('RequestMasterMatch', on_delete=models.CASCADE)
@@ -65,10 +91,14 @@ class Quotation(models.Model):
     
     class Meta:
         db_table = "quotations"
+        indexes  = [
+            models.Index(fields=['match', 'id'], name='quotation_match_first_idx'),
+        ]
 
 class QuotationImage(models.Model):
-    quotation = models.ForeignKey('Quotation', on_delete=models.CASCADE)
-    image_url = models.URLField(max_length=2000)
+    quotation     = models.ForeignKey('Quotation', on_delete=models.CASCADE)
+    image_url     = models.URLField(max_length=2000)
+    thumbnail_url = models.URLField(max_length=2000, null=True)
 
     class Meta:
         db_table = "quotation_images"
@@ -78,3 +108,37 @@ class PricingMethod(models.Model):
 
     class Meta:
         db_table = "pricing_methods"
+
+class MatchingJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE    = 'done'
+    FAILED  = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'pending'),
+        (RUNNING, 'running'),
+        (DONE, 'done'),
+        (FAILED, 'failed'),
+    )
+
+    request     = models.ForeignKey('Request', on_delete=models.CASCADE)
+    status      = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts    = models.PositiveSmallIntegerField(default=0)
+    matched     = models.PositiveIntegerField(default=0)
+    latency_ms  = models.PositiveIntegerField(null=True)
+    error       = models.CharField(max_length=200, null=True)
+    created_at  = models.DateTimeField(auto_now_add=True)
+    started_at  = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        db_table = "matching_jobs"
+        indexes  = [models.Index(fields=['status', 'id'])]
+
+class Event(models.Model):
+    channel    = models.CharField(max_length=100)
+    payload    = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "events"
@@ -0,0 +1,123 @@
+from decimal import Decimal, InvalidOperation
+
+from django.conf      import settings
+from django.db        import transaction
+from django.db.models import Count
+from django.utils     import timezone
+
+from services.models  import Quotation, Request, RequestMasterMatch, PricingMethod
+from services.events  import publish_on_commit, user_channel, master_channel
+from services.caching import cache_get, cache_set
+from users.capacity   import release_match, release_matches
+from users.badges     import add_new_quotations
+from users.stats      import record_hire
+
+PRICING_METHODS_KEY = 'pricing_methods'
+MAX_PRICE           = Decimal('100000000')
+
+def pricing_methods():
+    methods = cache_get(PRICING_METHODS_KEY)
+    if methods is None:
+        methods = dict(PricingMethod.objects.values_list('name', 'id'))
+        cache_set(PRICING_METHODS_KEY, methods, getattr(settings, 'PRICING_METHOD_CACHE_TTL', 3600))
+    return methods
+
+def parse_price(value):
+    try:
+        price = Decimal(str(value))
+        if not price.is_finite() or not 0 <= price < MAX_PRICE:
+            return None
+        return price.quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError):
+        return None
+
+def submit_quotations(master_id, entries):
+    methods = pricing_methods()
+    results = []
+    valid   = {}
+
+    for entry in entries:
+        try:
+            request_id = int(entry['requestId'])
+            price      = parse_price(entry['price'])
+            method_id  = methods.get(entry['pricingMethod'])
+        except (KeyError, TypeError, ValueError):
+            results.append({'requestId': entry.get('requestId') if isinstance(entry, dict) else None, 'MESSAGE': 'KEY_ERROR'})
+            continue
+
+        result = {'requestId': request_id}
+        if price is None:
+            result['MESSAGE'] = 'INVALID_PRICE'
+        elif method_id is None:
+            result['MESSAGE'] = 'PRICING_METHOD_DOES_NOT_EXISTS'
+        elif request_id in valid:
+            result['MESSAGE'] = 'DUPLICATED_REQUEST'
+        else:
+            valid[request_id] = (price, method_id, result)
+        results.append(result)
+
+    with transaction.atomic():
+        open_ids = set(Request.objects.select_for_update()
+                                      .filter(id__in=valid, closed_at=None)
+                                      .order_by('id')
+                                      .values_list('id', flat=True))
+        matches  = {
+            request_id: (match_id, user_id, quotations)
+            for match_id, request_id, user_id, quotations in RequestMasterMatch.objects.filter(
+                master_id      = master_id,
+                request_id__in = valid,
+            ).annotate(quotations=Count('quotation')).values_list(
+                'id', 'request_id', 'request__user_id', 'quotations'
+            )
+        }
+
+        to_create = []
+        notified  = []
+        released  = 0
+        for request_id, (price, method_id, result) in valid.items():
+            if request_id not in matches:
+                result['MESSAGE'] = 'REQUEST_NOT_MATCHED'
+                continue
+
+            if request_id not in open_ids:
+                result['MESSAGE'] = 'REQUEST_CLOSED'
+                continue
+
+            match_id, user_id, quotations = matches[request_id]
+            to_create.append(Quotation(match_id=match_id, price=price, pricing_method_id=method_id))
+            notified.append((request_id, user_id, price))
+            released         += not quotations
+            result['MESSAGE'] = 'QUOTATION_SENT'
+
+        Quotation.objects.bulk_create(to_create)
+        release_match(master_id, released)
+        add_new_quotations([user_id for _, user_id, _ in notified])
+        publish_on_commit((user_channel(user_id), {
+            'type'      : 'quotation',
+            'requestId' : request_id,
+            'masterId'  : master_id,
+            'price'     : price,
+        }) for request_id, user_id, price in notified)
+
+    return results
+
+def accept_quotation(user_id, quotation_id):
+    with transaction.atomic():
+        quotation = Quotation.objects.select_related('match').get(id=quotation_id, match__request__user_id=user_id)
+        request   = Request.objects.select_for_update().only('closed_at').get(id=quotation.match.request_id)
+
+        if request.closed_at:
+            return False
+
+        list(Quotation.objects.select_for_update().filter(match__request_id=request.id).values_list('id', flat=True))
+        Quotation.objects.filter(id=quotation.id).update(is_employed=True)
+        Request.objects.filter(id=request.id).update(closed_at=timezone.now())
+        record_hire(quotation.match.master_id)
+        release_matches(RequestMasterMatch.objects.filter(request_id=request.id, quotation=None).values_list('master_id', flat=True))
+        publish_on_commit([(master_channel(quotation.match.master_id), {
+            'type'        : 'hired',
+            'requestId'   : request.id,
+            'quotationId' : quotation.id,
+        })])
+
+    return True
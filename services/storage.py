@@ -0,0 +1,147 @@
+import os
+import uuid
+
+from django.conf                 import settings
+from django.utils.module_loading import import_string
+
+class LocalUpload:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.file = open(path+'.part', 'wb')
+
+    def write(self, chunk):
+        self.file.write(chunk)
+
+    def complete(self):
+        self.file.close()
+        os.replace(self.path+'.part', self.path)
+
+    def abort(self):
+        self.file.close()
+        os.remove(self.path+'.part')
+
+class LocalStorage:
+    """
+    Stores objects under a directory using the same key/url interface as S3Storage.
+    """
+    def __init__(self, root, base_url):
+        self.root     = str(root)
+        self.base_url = base_url.rstrip('/')
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def url(self, key):
+        return f'{self.base_url}/{key}'
+
+    def open_upload(self, key, content_type=None):
+        return LocalUpload(self.path(key))
+
+    def read(self, key):
+        with open(self.path(key), 'rb') as in_file:
+            return in_file.read()
+
+    def save(self, key, data, content_type=None):
+        upload = self.open_upload(key, content_type)
+        upload.write(data)
+        upload.complete()
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+class S3Upload:
+    PART_SIZE = 5 * 1024 * 1024
+
+    def __init__(self, client, bucket, key, content_type):
+        self.client  = client
+        self.bucket  = bucket
+        self.key     = key
+        self.buffer  = bytearray()
+        self.parts   = []
+        self.upload  = client.create_multipart_upload(
+            Bucket      = bucket,
+            Key         = key,
+            ContentType = content_type or 'application/octet-stream',
+        )['UploadId']
+
+    def flush(self):
+        number   = len(self.parts)+1
+        response = self.client.upload_part(
+            Bucket     = self.bucket,
+            Key        = self.key,
+            UploadId   = self.upload,
+            PartNumber = number,
+            Body       = bytes(self.buffer),
+        )
+        self.parts.append({'ETag': response['ETag'], 'PartNumber': number})
+        self.buffer.clear()
+
+    def write(self, chunk):
+        self.buffer.extend(chunk)
+        if len(self.buffer) >= self.PART_SIZE:
+            self.flush()
+
+    def complete(self):
+        if self.buffer or not self.parts:
+            self.flush()
+        self.client.complete_multipart_upload(
+            Bucket          = self.bucket,
+            Key             = self.key,
+            UploadId        = self.upload,
+            MultipartUpload = {'Parts': self.parts},
+        )
+
+    def abort(self):
+        self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload)
+
+class S3Storage:
+    def __init__(self, bucket, base_url, **client_options):
+        import boto3
+
+        self.client   = boto3.client('s3', **client_options)
+        self.bucket   = bucket
+        self.base_url = base_url.rstrip('/')
+
+    def url(self, key):
+        return f'{self.base_url}/{key}'
+
+    def open_upload(self, key, content_type=None):
+        return S3Upload(self.client, self.bucket, key, content_type)
+
+    def read(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+
+    def save(self, key, data, content_type=None):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data, ContentType=content_type or 'application/octet-stream')
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+_storage = None
+
+def get_storage():
+    global _storage
+
+    if _storage is None:
+        backend  = import_string(getattr(settings, 'QUOTATION_IMAGE_STORAGE', 'services.storage.LocalStorage'))
+        _storage = backend(**getattr(settings, 'QUOTATION_IMAGE_STORAGE_OPTIONS', {
+            'root'     : settings.BASE_DIR / 'media',
+            'base_url' : '/media',
+        }))
+
+    return _storage
+
+def reset_storage():
+    global _storage
+    _storage = None
+
+def new_key(prefix, file_name):
+    extension = os.path.splitext(file_name)[1].lower()
+    return f'{prefix}/{uuid.uuid4().hex}{extension}'
+
+def thumbnail_key(key):
+    return os.path.splitext(key)[0]+'_thumb.jpg'
@@ -0,0 +1,87 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf  import settings
+
+from services.events import get_broker, master_channel, user_channel
+from users.auth      import InvalidToken, authorize, consume_token
+
+def resolve_channels(token, kind='access'):
+    try:
+        principal, claims = authorize(token, kind)
+    except InvalidToken:
+        return []
+
+    if kind == 'stream' and not consume_token(claims):
+        return []
+
+    channels = [user_channel(principal.user_id)]
+    if principal.master_id:
+        channels.append(master_channel(principal.master_id))
+    return channels
+
+def credentials(scope):
+    headers = dict(scope.get('headers', []))
+    if headers.get(b'authorization'):
+        return headers[b'authorization'].decode(), 'access'
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    return query.get('ticket', [''])[0], 'stream'
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+async def send_json(send, status, body):
+    await send({
+        'type'    : 'http.response.start',
+        'status'  : status,
+        'headers' : [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(body).encode()})
+
+async def event_stream(scope, receive, send):
+    token, kind = credentials(scope)
+    channels    = await sync_to_async(resolve_channels)(token, kind) if token else []
+
+    if not channels:
+        return await send_json(send, 401, {'MESSAGE': 'LOGIN_REQUIRED'})
+
+    heartbeat    = getattr(settings, 'EVENT_STREAM_HEARTBEAT', 15)
+    subscription = get_broker().subscribe(channels)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+
+    await send({
+        'type'    : 'http.response.start',
+        'status'  : 200,
+        'headers' : [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+
+    try:
+        while True:
+            next_event = asyncio.ensure_future(subscription.get())
+            done, _    = await asyncio.wait({next_event, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+
+            if disconnected in done:
+                next_event.cancel()
+                break
+
+            if next_event in done:
+                event   = next_event.result()
+                payload = f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            else:
+                next_event.cancel()
+                payload = ': heartbeat\n\n'
+
+            await send({'type': 'http.response.body', 'body': payload.encode(), 'more_body': True})
+    finally:
+        subscription.close()
+        disconnected.cancel()
+
+    await send({'type': 'http.response.body', 'body': b''})
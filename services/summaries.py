@@ -0,0 +1,67 @@
+from django.conf      import settings
+from django.db        import transaction
+from django.db.models import Count
+
+from services.models  import RequestSummary, Request
+from services.caching import cache_get, cache_set, cache_delete_many
+
+def summarize(which_request, question_choices):
+    return RequestSummary(
+        request         = which_request,
+        service_name    = which_request.service.name if which_request.service else None,
+        region_name     = which_request.subregion.region.name+' '+which_request.subregion.name,
+        choices         = [
+            {'question': question_choice.question.name, 'choice': question_choice.choice}
+            for question_choice in question_choices
+        ],
+        requester_name  = which_request.user.name,
+        requester_image = which_request.user.profile_image,
+    )
+
+def get_summary(which_request):
+    try:
+        return which_request.summary
+    except RequestSummary.DoesNotExist:
+        which_request = Request.objects.select_related('user', 'service', 'subregion__region')\
+                                       .prefetch_related('selectedchoice_set__choice__question')\
+                                       .get(id=which_request.id)
+        summary       = summarize(which_request, [
+            selected.choice for selected in which_request.selectedchoice_set.all() if selected.choice
+        ])
+        summary.save()
+        return summary
+
+def choices_string(summary):
+    return ''.join(str(chosen['choice'])+',' for chosen in summary.choices)
+
+def detail_cache_key(request_id):
+    return f'request_detail:{request_id}'
+
+def get_request_detail(request_id):
+    key     = detail_cache_key(request_id)
+    details = cache_get(key)
+    if details is not None:
+        return details
+
+    which_request = Request.objects.select_related('summary')\
+                                   .annotate(matched=Count('requestmastermatch'))\
+                                   .get(id=request_id)
+    summary       = get_summary(which_request)
+    details       = [{
+        'requester'          : summary.requester_name,
+        'requesterImage'     : summary.requester_image,
+        'service'            : summary.service_name,
+        'region'             : summary.region_name,
+        'receivedQuotations' : which_request.matched,
+    }]+[{
+        'question' : chosen['question'],
+        'choice'   : chosen['choice'],
+    } for chosen in summary.choices]
+
+    cache_set(key, details, getattr(settings, 'REQUEST_DETAIL_CACHE_TTL', 300))
+    return details
+
+def invalidate_request_detail(request_ids):
+    keys = [detail_cache_key(request_id) for request_id in set(request_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache_delete_many(keys))
@@ -1,16 +1,39 @@
-from django.test     import TestCase, Client, TransactionTestCase
-from unittest.mock   import patch, MagicMock
-from services.models import Category, Service, Question, QuestionChoice, Request
-from users.models    import Review, MasterService, User, Gender, Region, SubRegion, Master
-from datetime        import datetime, timedelta
-from my_settings     import SECRET_KEY, ALGORITHM
+from django.test                    import TestCase, Client, TransactionTestCase
+from django.test.utils              import CaptureQueriesContext, override_settings
+from django.db                      import connection, DatabaseError
+from django.core.cache              import cache
+from django.core.cache.backends.db  import DatabaseCache
+from django.core.management         import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from asgiref.sync                   import sync_to_async
+from unittest.mock                  import patch, MagicMock
+from services.models                import Category, Service, Question, QuestionChoice, Request, SelectedChoice, RequestMasterMatch, MatchingJob, RequestSummary, PricingMethod, Quotation, QuotationImage, Event
+from services                       import matching, jobs, events, uploads
+from services.streams               import event_stream
+from services.storage               import reset_storage
+from services.summaries             import summarize, get_request_detail
+from services.checks                import shared_cache_check
+from users.models                   import Review, MasterService, User, Gender, Region, SubRegion, Master, MasterCapacity, Badge, MasterStats
+from users.distances                import reset_distance_table
+from datetime                       import datetime, timedelta
+from io                             import StringIO, BytesIO
+from my_settings                    import SECRET_KEY, ALGORITHM
  
 
+import asyncio
 import bcrypt
+import importlib
 import json
 import jwt
+import os
+import tempfile
+import time
+import unittest
 
 client = Client()
+
+def access_token(user_id):
+    return jwt.encode({'user_id':user_id, 'exp':int(time.time())+900}, SECRET_KEY, algorithm=ALGORITHM)
 class CategoryViewTest(TransactionTestCase):
     reset_sequences = True
     def setUp(self):
@@ -232,7 +255,7 @@ class ServiceDetailViewTest(TransactionTestCase):
         user=User.objects.get(id=1)
         AVG_RATING = (4.5+5.0)/2
         service1   = Service.objects.get(id=1)
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         headers    = {"HTTP_Authorization" : user_token}
         
         response = client.get('/services/details',{'serviceId': 1}, **headers, content_type='application/json')
@@ -253,7 +276,7 @@ class ServiceDetailViewTest(TransactionTestCase):
 
     def test_service_details_response_service_does_not_exist_fail(self):
         user       = User.objects.get(id=1)
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         headers         = {"HTTP_Authorization" : user_token}
         response = client.get('/services/details',{'serviceId': 5}, **headers, content_type='application/json')
         self.assertEqual(response.json(),
@@ -275,7 +298,7 @@ class ServiceDetailViewTest(TransactionTestCase):
     def test_service_details_user_invalid(self):
         hashed_password = bcrypt.hashpw('1a2s3d4f'.encode('utf-8'), bcrypt.gensalt())
         user            = 4
-        user_token      = jwt.encode({'user_id':user}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token      = access_token(user)
         headers         = {"HTTP_Authorization" : user_token}
         response        = client.get('/services/details',{'serviceId': 1}, **headers, content_type='application/json')
         self.assertEqual(response.json(),
@@ -288,7 +311,7 @@ class ServiceDetailViewTest(TransactionTestCase):
     def test_service_details_token_JWT_decode_error(self):
         user       = User.objects.get(id=1)
         SECRET     = 'FAKE_SECRET'
-        user_token = jwt.encode({'user_id':user.id}, SECRET, algorithm=ALGORITHM)
+        user_token = jwt.encode({'user_id':user.id, 'exp':int(time.time())+900}, SECRET, algorithm=ALGORITHM)
         headers    = {"HTTP_Authorization" : user_token}
         response   = client.get('/services/details',{'serviceId': 1}, **headers, content_type='application/json')
         self.assertEqual(response.json(),
@@ -331,4 +354,973 @@ class RegionViewTest(TransactionTestCase):
             }
         )
 
-        self.assertEqual(response.status_code, 200)
\ No newline at end of file
+        self.assertEqual(response.status_code, 200)
+
+class RequestDistributionViewTest(TransactionTestCase):
+    reset_sequences = True
+    def setUp(self):
+        matching.invalidate_index()
+        cache.clear()
+        male       = Gender.objects.create(name='남자')
+        female     = Gender.objects.create(name='여자')
+        region1    = Region.objects.create(name='서울특별시')
+        region2    = Region.objects.create(name='경기도')
+        gwangjin   = SubRegion.objects.create(region=region1, name='광진구')
+        gangnam    = SubRegion.objects.create(region=region1, name='강남구')
+        suwon      = SubRegion.objects.create(region=region2, name='수원시')
+        category   = Category.objects.create(name='TestCategory')
+        service    = Service.objects.create(category=category, name='TestService')
+        question1  = Question.objects.create(name='TestQuestion1')
+        question2  = Question.objects.create(name='TestQuestion2')
+        birthdate  = datetime.strptime('19901103', '%Y%m%d').date()
+        candidates = [
+            ('test1@mail.com', male, gwangjin, True),
+            ('test2@mail.com', female, gangnam, False),
+            ('test3@mail.com', female, suwon, True),
+        ]
+        for email, gender, subregion, is_main in candidates:
+            user   = User.objects.create(name='고수', email=email, password='password', gender=gender, is_master=True)
+            master = Master.objects.create(user=user, birthdate=birthdate, subregions=subregion)
+            MasterService.objects.create(master=master, service=service, is_main=is_main)
+
+        requester   = User.objects.create(name='요청자', email='requester@mail.com', password='password')
+        new_request = Request.objects.create(
+            user       = requester,
+            service    = service,
+            subregion  = gwangjin,
+            expired_at = datetime.now()+timedelta(days=7),
+        )
+        SelectedChoice.objects.create(
+            request = new_request,
+            choice  = QuestionChoice.objects.create(question=question1, choice='TestChoice1-1'),
+        )
+        SelectedChoice.objects.create(
+            request = new_request,
+            choice  = QuestionChoice.objects.create(question=question2, choice='여자'),
+        )
+
+    def test_match_masters_success(self):
+        response = client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'MESSAGE':'REQUEST_MATCHED_SUCCESSFUL', 'Matched_Master':3})
+        self.assertEqual(
+            list(RequestMasterMatch.objects.order_by('master_id').values_list('master_id', 'priority')),
+            [(1, 4), (2, 2), (3, 2)]
+        )
+
+    def test_match_masters_updates_badges_success(self):
+        client.post('/services/matchMasters?serviceId=1&requestId=1')
+        headers = {"HTTP_Authorization" : access_token(1)}
+
+        self.assertEqual(client.get('/users/badges', **headers).json(), {'newRequests':1, 'newQuotations':0})
+        client.get('/services/receivedRequest', **headers)
+        self.assertEqual(client.get('/users/badges', **headers).json(), {'newRequests':0, 'newQuotations':0})
+
+    def test_request_detail_cached_until_matched_success(self):
+        headers = {"HTTP_Authorization" : access_token(1)}
+        first   = client.get('/services/requestDetail', {'requestId':1}, **headers).json()
+
+        with CaptureQueriesContext(connection) as cached:
+            second = client.get('/services/requestDetail', {'requestId':1}, **headers).json()
+
+        self.assertEqual(first, second)
+        self.assertEqual(first['requestDetail'][0]['receivedQuotations'], 0)
+        self.assertEqual(first['requestDetail'][1:], [
+            {'question':'TestQuestion1', 'choice':'TestChoice1-1'},
+            {'question':'TestQuestion2', 'choice':'여자'},
+        ])
+        self.assertFalse([query for query in cached.captured_queries if 'requests' in query['sql']])
+
+        client.post('/services/matchMasters?serviceId=1&requestId=1')
+        third = client.get('/services/requestDetail', {'requestId':1}, **headers).json()
+
+        self.assertEqual(third['requestDetail'][0]['receivedQuotations'], 3)
+
+    def test_request_detail_invalidated_across_processes(self):
+        web_process    = DatabaseCache('cache_table', {})
+        worker_process = DatabaseCache('cache_table', {})
+
+        with patch('services.caching.cache', web_process):
+            first = get_request_detail(1)
+        with patch('services.caching.cache', worker_process):
+            client.post('/services/matchMasters?serviceId=1&requestId=1')
+        with patch('services.caching.cache', web_process):
+            second = get_request_detail(1)
+
+        self.assertEqual(first[0]['receivedQuotations'], 0)
+        self.assertEqual(second[0]['receivedQuotations'], 3)
+
+    def test_cache_errors_do_not_fail_committed_work(self):
+        broken = MagicMock(**{
+            'get.side_effect'         : DatabaseError('no such table: cache_table'),
+            'set.side_effect'         : DatabaseError('no such table: cache_table'),
+            'delete_many.side_effect' : DatabaseError('no such table: cache_table'),
+        })
+        headers = {"HTTP_Authorization" : access_token(1)}
+
+        with patch('services.caching.cache', broken), self.assertLogs('services.caching', 'ERROR'):
+            detail  = client.get('/services/requestDetail', {'requestId':1}, **headers)
+            matched = client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(matched.json(), {'MESSAGE':'REQUEST_MATCHED_SUCCESSFUL', 'Matched_Master':3})
+        self.assertTrue(broken.delete_many.called)
+
+    def test_migration_creates_cache_table(self):
+        migration = importlib.import_module('services.migrations.0023_cache_table')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE cache_table')
+
+        with connection.schema_editor() as schema_editor:
+            migration.create_cache_table(None, schema_editor)
+
+        self.assertIn('cache_table', connection.introspection.table_names())
+
+    def test_shared_cache_check(self):
+        with override_settings(CACHES={'default':{'BACKEND':'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([warning.id for warning in shared_cache_check(None)], ['services.W001'])
+        self.assertEqual(shared_cache_check(None), [])
+
+    def test_match_masters_publishes_events_success(self):
+        broker = MagicMock()
+        with patch('services.events.get_broker', return_value=broker):
+            client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        self.assertEqual(
+            sorted(broker.publish_many.call_args.args[0]),
+            [
+                ('master:1', {'type':'match', 'requestId':1, 'priority':4}),
+                ('master:2', {'type':'match', 'requestId':1, 'priority':2}),
+                ('master:3', {'type':'match', 'requestId':1, 'priority':2}),
+            ]
+        )
+
+    def test_match_masters_retry_is_no_op_success(self):
+        client.post('/services/matchMasters?serviceId=1&requestId=1')
+        response = client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        self.assertEqual(response.json(), {'MESSAGE':'REQUEST_MATCHED_SUCCESSFUL', 'Matched_Master':3})
+        self.assertEqual(RequestMasterMatch.objects.filter(request_id=1).count(), 3)
+        self.assertEqual(MasterCapacity.objects.get(master_id=1).open_matches, 1)
+
+    @override_settings(MATCHING_TOP_K=2)
+    def test_match_masters_top_k_success(self):
+        response = client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        self.assertEqual(response.json(), {'MESSAGE':'REQUEST_MATCHED_SUCCESSFUL', 'Matched_Master':2})
+        self.assertEqual(
+            list(RequestMasterMatch.objects.order_by('master_id').values_list('master_id', 'priority')),
+            [(1, 4), (2, 2)]
+        )
+
+    def test_match_masters_counts_existing_matches_once(self):
+        matching.match_master(1)
+        broker = MagicMock()
+        with patch('services.events.get_broker', return_value=broker):
+            response = client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        self.assertEqual(response.json(), {'MESSAGE':'REQUEST_MATCHED_SUCCESSFUL', 'Matched_Master':3})
+        self.assertEqual(
+            list(MasterCapacity.objects.filter(master_id=1).values_list('daily_matches', 'open_matches')),
+            [(1, 1)]
+        )
+        self.assertEqual(Badge.objects.get(user_id=1).new_requests, 1)
+        self.assertEqual(sorted(channel for channel, _ in broker.publish_many.call_args.args[0]), ['master:2', 'master:3'])
+
+    @override_settings(MATCHING_TOP_K=2)
+    def test_match_masters_top_k_includes_existing_matches(self):
+        RequestMasterMatch.objects.create(request_id=1, master_id=3, priority=2)
+        response = client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        self.assertEqual(response.json(), {'MESSAGE':'REQUEST_MATCHED_SUCCESSFUL', 'Matched_Master':2})
+        self.assertEqual(
+            list(RequestMasterMatch.objects.order_by('master_id').values_list('master_id', flat=True)),
+            [1, 3]
+        )
+
+    def test_match_master_publishes_after_commit(self):
+        broker    = MagicMock()
+        in_atomic = []
+        def publish(messages):
+            in_atomic.append(connection.in_atomic_block)
+            events.publish_on_commit(messages)
+
+        with patch('services.events.get_broker', return_value=broker), patch('services.matching.publish_on_commit', publish):
+            matching.match_master(1)
+
+        self.assertEqual(in_atomic, [True])
+        self.assertEqual([channel for channel, _ in broker.publish_many.call_args.args[0]], ['master:1'])
+
+    @override_settings(MASTER_OPEN_MATCH_CAP=1)
+    def test_match_masters_skips_saturated_master_success(self):
+        MasterCapacity.objects.create(master_id=1, day=datetime.now().date(), open_matches=1)
+        response = client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        self.assertEqual(response.json(), {'MESSAGE':'REQUEST_MATCHED_SUCCESSFUL', 'Matched_Master':2})
+        self.assertEqual(
+            list(MasterCapacity.objects.order_by('master_id').values_list('master_id', 'daily_matches', 'open_matches')),
+            [(1, 0, 1), (2, 1, 1), (3, 1, 1)]
+        )
+
+    def test_match_masters_distance_decay_success(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as distances:
+            distances.write('region,subregion,near_region,near_subregion,distance_km\n')
+            distances.write('서울특별시,광진구,서울특별시,강남구,5\n')
+            distances.write('서울특별시,광진구,경기도,수원시,30\n')
+            distances.flush()
+
+            with override_settings(SUBREGION_DISTANCE_CSV=distances.name):
+                reset_distance_table()
+                self.addCleanup(reset_distance_table)
+                client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        self.assertEqual(
+            list(RequestMasterMatch.objects.order_by('master_id').values_list('master_id', 'priority')),
+            [(1, 4), (2, 3), (3, 2)]
+        )
+
+    def test_match_masters_query_count_does_not_grow(self):
+        with CaptureQueriesContext(connection) as few_masters:
+            client.post('/services/matchMasters?serviceId=1&requestId=1')
+
+        service   = Service.objects.get(id=1)
+        subregion = SubRegion.objects.get(id=1)
+        birthdate = datetime.strptime('19901103', '%Y%m%d').date()
+        for i in range(20):
+            user   = User.objects.create(name='고수', email=f'more{i}@mail.com', password='password')
+            master = Master.objects.create(user=user, birthdate=birthdate, subregions=subregion)
+            MasterService.objects.create(master=master, service=service)
+        matching.invalidate_index()
+        Request.objects.create(
+            user       = User.objects.get(email='requester@mail.com'),
+            service    = service,
+            subregion  = subregion,
+            expired_at = datetime.now()+timedelta(days=7),
+        )
+
+        with CaptureQueriesContext(connection) as many_masters:
+            client.post('/services/matchMasters?serviceId=1&requestId=2')
+
+        self.assertEqual(len(few_masters), len(many_masters))
+
+    def test_request_enqueues_matching_job_success(self):
+        user_token = access_token(4)
+        headers    = {"HTTP_Authorization" : user_token}
+        body       = {'region':'강남구', 'choices':['TestChoice1-1', '여자']}
+        response   = client.post('/services/requests?serviceId=1', json.dumps(body), **headers, content_type='application/json')
+
+        self.assertEqual(response.json(), {'MESSAGE':'REQUEST_MADE_SUCCESSFUL', 'requestId':2})
+        self.assertEqual(MatchingJob.objects.get(request_id=2).status, MatchingJob.PENDING)
+        self.assertEqual(
+            RequestSummary.objects.filter(request_id=2).values('service_name', 'region_name', 'choices', 'requester_name').get(),
+            {
+                'service_name'   : 'TestService',
+                'region_name'    : '서울특별시 강남구',
+                'choices'        : [
+                    {'question':'TestQuestion1', 'choice':'TestChoice1-1'},
+                    {'question':'TestQuestion2', 'choice':'여자'},
+                ],
+                'requester_name' : '요청자',
+            }
+        )
+        self.assertFalse(RequestMasterMatch.objects.filter(request_id=2).exists())
+
+        finished = jobs.run_pending()
+
+        self.assertEqual([(job.status, job.matched) for job in finished], [(MatchingJob.DONE, 3)])
+        self.assertEqual(jobs.claim_jobs(10), [])
+        self.assertEqual(RequestMasterMatch.objects.filter(request_id=2).count(), 3)
+
+    @override_settings(MATCHING_JOB_TIMEOUT=60, MATCHING_JOB_MAX_ATTEMPTS=3)
+    def test_stale_jobs_reclaimed_until_attempts_run_out(self):
+        started   = datetime.now()-timedelta(seconds=120)
+        retried   = MatchingJob.objects.create(request_id=1, status=MatchingJob.RUNNING, attempts=2, started_at=started)
+        exhausted = MatchingJob.objects.create(request_id=1, status=MatchingJob.RUNNING, attempts=3, started_at=started)
+
+        self.assertEqual(jobs.claim_jobs(10), [retried.id])
+        exhausted.refresh_from_db()
+        self.assertEqual((exhausted.status, exhausted.attempts, exhausted.error), (MatchingJob.FAILED, 3, 'TIMED_OUT'))
+        self.assertEqual(MatchingJob.objects.get(id=retried.id).attempts, 3)
+
+    def test_request_choices_resolved_per_question(self):
+        other_question = Question.objects.create(name='TestQuestion3')
+        other_choice   = QuestionChoice.objects.create(question=other_question, choice='여자')
+        headers        = {"HTTP_Authorization" : access_token(4)}
+
+        def post(choices):
+            body = {'region':'강남구', 'choices':choices}
+            return client.post('/services/requests?serviceId=1', json.dumps(body), **headers, content_type='application/json')
+
+        ambiguous = post(['TestChoice1-1', '여자'])
+        unknown   = post(['TestChoice1-1', '없는선택'])
+        by_pair   = post(['TestChoice1-1', {'questionId':2, 'choice':'여자'}])
+        by_id     = post(['TestChoice1-1', other_choice.id])
+
+        self.assertEqual((ambiguous.status_code, ambiguous.json()), (400, {'MESSAGE':'AMBIGUOUS_CHOICE'}))
+        self.assertEqual((unknown.status_code, unknown.json()), (400, {'MESSAGE':'CHOICE_DOES_NOT_EXISTS'}))
+        self.assertEqual(
+            list(SelectedChoice.objects.filter(request_id=by_pair.json()['requestId']).order_by('id').values_list('choice__question_id', flat=True)),
+            [1, 2]
+        )
+        self.assertEqual(
+            list(SelectedChoice.objects.filter(request_id=by_id.json()['requestId']).order_by('id').values_list('choice__question_id', flat=True)),
+            [1, other_question.id]
+        )
+
+    def test_request_choices_invalid_type(self):
+        headers = {"HTTP_Authorization" : access_token(4)}
+
+        for choice in [['TestChoice1-1'], True, 1.5, None, {'questionId':True, 'choice':'여자'}, {'questionId':2, 'choice':['여자']}]:
+            body     = {'region':'강남구', 'choices':['TestChoice1-1', choice]}
+            response = client.post('/services/requests?serviceId=1', json.dumps(body), **headers, content_type='application/json')
+
+            self.assertEqual((response.status_code, response.json()), (400, {'MESSAGE':'CHOICE_DOES_NOT_EXISTS'}))
+
+    def test_new_master_is_matched_to_open_requests_success(self):
+        client.post('/services/matchMasters?serviceId=1&requestId=1')
+        user       = User.objects.create(name='신입고수', email='new@mail.com', password='password')
+        user_token = access_token(user.id)
+        headers    = {"HTTP_Authorization" : user_token}
+        body       = {
+            'services'     : ['TestService'],
+            'gender'       : '여자',
+            'phone_number' : '01012345678',
+            'birthdate'    : '19901103',
+            'region'       : '서울특별시',
+            'sub_region'   : '광진구',
+        }
+        response   = client.post('/users/master_signup', json.dumps(body), **headers, content_type='application/json')
+        master     = Master.objects.get(user=user)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(RequestMasterMatch.objects.get(request_id=1, master=master).priority, 4)
+
+    def test_main_service_change_updates_priority_success(self):
+        client.post('/services/matchMasters?serviceId=1&requestId=1')
+        user_token = access_token(2)
+        headers    = {"HTTP_Authorization" : user_token}
+        body       = {'main_service':'TestService'}
+        response   = client.patch('/users/profile_main_service', json.dumps(body), **headers, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RequestMasterMatch.objects.get(request_id=1, master_id=2).priority, 3)
+        self.assertEqual(RequestMasterMatch.objects.filter(request_id=1).count(), 3)
+
+    def test_match_masters_request_does_not_exist(self):
+        response = client.post('/services/matchMasters?serviceId=1&requestId=99')
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'MESSAGE':'REQUEST_DOES_NOT_EXISTS'})
+
+    def test_benchmark_matching_rolls_back(self):
+        users = User.objects.count()
+        out   = StringIO()
+        call_command('benchmark_matching', '-masters', '20', '-services', '2', '-regions', '2', '-subregions', '2', '-requests', '3', stdout=out)
+
+        self.assertEqual(json.loads(out.getvalue())['match']['operations'], 3)
+        self.assertEqual(User.objects.count(), users)
+        self.assertFalse(Service.objects.filter(name__startswith='bench').exists())
+
+class ReceivedRequestListViewTest(TransactionTestCase):
+    reset_sequences = True
+    def setUp(self):
+        region    = Region.objects.create(name='서울특별시')
+        subregion = SubRegion.objects.create(region=region, name='광진구')
+        category  = Category.objects.create(name='TestCategory')
+        service   = Service.objects.create(category=category, name='TestService')
+        question  = Question.objects.create(name='TestQuestion1')
+        choice    = QuestionChoice.objects.create(question=question, choice='TestChoice1-1')
+        user      = User.objects.create(name='고수', email='master@mail.com', password='password', is_master=True)
+        requester = User.objects.create(name='요청자', email='requester@mail.com', password='password')
+        self.master = Master.objects.create(
+            user       = user,
+            birthdate  = datetime.strptime('19901103', '%Y%m%d').date(),
+            subregions = subregion,
+        )
+        for _ in range(5):
+            new_request = Request.objects.create(
+                user       = requester,
+                service    = service,
+                subregion  = subregion,
+                expired_at = datetime.now()+timedelta(days=7),
+            )
+            SelectedChoice.objects.create(request=new_request, choice=choice)
+            summarize(new_request, [choice]).save()
+            RequestMasterMatch.objects.create(
+                request            = new_request,
+                master             = self.master,
+                priority           = new_request.id % 3,
+                request_created_at = new_request.created_at,
+            )
+
+        self.headers = {"HTTP_Authorization" : access_token(user.id)}
+
+    def test_received_requests_cursor_pagination_success(self):
+        first  = client.get('/services/receivedRequest', {'limit':3}, **self.headers).json()
+        second = client.get('/services/receivedRequest', {'limit':3, 'cursor':first['nextCursor']}, **self.headers).json()
+
+        self.assertEqual([each['requestId'] for each in first['receivedRequests']], [5, 4, 3])
+        self.assertEqual([each['requestId'] for each in second['receivedRequests']], [2, 1])
+        self.assertEqual(second['nextCursor'], None)
+        self.assertEqual(first['receivedRequests'][0]['region'], '서울특별시 광진구')
+        self.assertEqual(first['receivedRequests'][0]['choices'], 'TestChoice1-1,')
+
+    def test_received_requests_ranked_by_priority_success(self):
+        Request.objects.filter(id=3).update(expired_at=datetime.now()-timedelta(days=1))
+        first  = client.get('/services/receivedRequest', {'sort':'priority', 'limit':2}, **self.headers).json()
+        second = client.get('/services/receivedRequest', {'sort':'priority', 'limit':2, 'cursor':first['nextCursor']}, **self.headers).json()
+
+        self.assertEqual([each['requestId'] for each in first['receivedRequests']], [5, 2])
+        self.assertEqual([each['requestId'] for each in second['receivedRequests']], [4, 1])
+        self.assertEqual(second['nextCursor'], None)
+
+    def test_received_requests_query_count_is_constant(self):
+        client.get('/services/receivedRequest', {'limit':1}, **self.headers)
+        with CaptureQueriesContext(connection) as small_page:
+            client.get('/services/receivedRequest', {'limit':1}, **self.headers)
+
+        with CaptureQueriesContext(connection) as large_page:
+            client.get('/services/receivedRequest', {'limit':5}, **self.headers)
+
+        self.assertEqual(len(small_page), len(large_page))
+
+    def test_match_copies_request_created_at(self):
+        new_request = Request.objects.create(
+            user       = User.objects.get(email='requester@mail.com'),
+            service    = Service.objects.get(id=1),
+            subregion  = SubRegion.objects.get(id=1),
+            expired_at = datetime.now()+timedelta(days=7),
+        )
+        match = RequestMasterMatch.objects.create(request=new_request, master=self.master)
+
+        self.assertEqual(RequestMasterMatch.objects.get(id=match.id).request_created_at, new_request.created_at)
+
+    def test_received_requests_invalid_cursor(self):
+        response = client.get('/services/receivedRequest', {'cursor':'not-a-cursor'}, **self.headers)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE':'VALUE_ERROR_OCCURED'})
+
+class EventStreamTest(TransactionTestCase):
+    reset_sequences = True
+    def setUp(self):
+        self.user  = User.objects.create(name='고수', email='master@mail.com', password='password', is_master=True)
+        self.token = access_token(self.user.id)
+        Master.objects.create(
+            user       = self.user,
+            birthdate  = datetime.strptime('19901103', '%Y%m%d').date(),
+            subregions = SubRegion.objects.create(region=Region.objects.create(name='서울특별시'), name='광진구'),
+        )
+
+    def test_event_fans_out_across_brokers(self):
+        async def scenario():
+            backend      = events.LocalBackend()
+            node1        = events.Broker(backend)
+            node2        = events.Broker(backend)
+            subscription = node2.subscribe(['master:1'])
+            node1.publish('master:1', {'type':'match', 'requestId':1, 'priority':4})
+            return await asyncio.wait_for(subscription.get(), timeout=1)
+
+        self.assertEqual(asyncio.run(scenario()), {'type':'match', 'requestId':1, 'priority':4})
+
+    @override_settings(EVENT_POLL_INTERVAL=0.05)
+    def test_event_crosses_processes_through_database(self):
+        listener_backend = events.DatabaseBackend()
+        publisher        = events.Broker(events.DatabaseBackend())
+        listener         = events.Broker(listener_backend)
+
+        async def scenario():
+            subscription = listener.subscribe(['master:1'])
+            while listener_backend.floor is None:
+                await asyncio.sleep(0.01)
+            await sync_to_async(publisher.publish)('master:1', {'type':'match', 'requestId':1, 'priority':4})
+            return await asyncio.wait_for(subscription.get(), timeout=5)
+
+        try:
+            self.assertEqual(asyncio.run(scenario()), {'type':'match', 'requestId':1, 'priority':4})
+        finally:
+            listener_backend.stop()
+
+    def test_publishing_prunes_old_events_without_subscribers(self):
+        backend = events.DatabaseBackend()
+        backend.publish('master:1', '{}')
+        Event.objects.update(created_at=datetime.now()-timedelta(seconds=backend.retention+1))
+
+        backend.publish('master:1', '{}')
+        self.assertEqual(Event.objects.count(), 2)
+
+        backend.pruned -= backend.retention
+        backend.publish('master:1', '{}')
+        self.assertEqual(Event.objects.count(), 2)
+        self.assertIsNone(backend.thread)
+
+    def stream_status(self, scope):
+        sent = []
+
+        async def receive():
+            return {'type':'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(event_stream(scope, receive, send))
+        return sent[0]['status']
+
+    def test_event_stream_ticket_is_single_use(self):
+        ticket = client.post('/services/streamTicket', HTTP_Authorization=self.token).json()['ticket']
+        scope  = {'type':'http', 'query_string':f'ticket={ticket}'.encode()}
+
+        self.assertEqual(self.stream_status(scope), 200)
+        self.assertEqual(self.stream_status(scope), 401)
+
+    def test_event_stream_rejects_token_in_query_string(self):
+        self.assertEqual(self.stream_status({'type':'http', 'query_string':f'token={self.token}'.encode()}), 401)
+        self.assertEqual(self.stream_status({'type':'http', 'query_string':f'ticket={self.token}'.encode()}), 401)
+
+    def test_event_stream_without_token(self):
+        sent = []
+
+        async def receive():
+            return {'type':'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(event_stream({'type':'http', 'query_string':b''}, receive, send))
+
+        self.assertEqual(sent[0]['status'], 401)
+        self.assertEqual(json.loads(sent[1]['body']), {'MESSAGE':'LOGIN_REQUIRED'})
+
+    def test_event_stream_pushes_master_event(self):
+        sent = []
+        broker = events.Broker(events.LocalBackend())
+
+        async def scenario():
+            disconnect = asyncio.Event()
+
+            async def receive():
+                await disconnect.wait()
+                return {'type':'http.disconnect'}
+
+            async def send(message):
+                sent.append(message)
+                if message['type'] == 'http.response.start':
+                    broker.publish('master:1', {'type':'match', 'requestId':7, 'priority':3})
+                elif message.get('more_body'):
+                    disconnect.set()
+
+            scope = {'type':'http', 'headers':[(b'authorization', self.token.encode())], 'query_string':b''}
+            await asyncio.wait_for(event_stream(scope, receive, send), timeout=5)
+
+        with patch('services.streams.get_broker', return_value=broker):
+            asyncio.run(scenario())
+
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertEqual(
+            sent[1]['body'].decode(),
+            'event: match\ndata: {"type": "match", "requestId": 7, "priority": 3}\n\n'
+        )
+        self.assertEqual(broker.subscribers, {})
+
+class QuotationListViewTest(TransactionTestCase):
+    reset_sequences = True
+    def setUp(self):
+        self.subregion = SubRegion.objects.create(region=Region.objects.create(name='서울특별시'), name='광진구')
+        self.service   = Service.objects.create(category=Category.objects.create(name='TestCategory'), name='TestService')
+        self.requester = User.objects.create(name='요청자', email='requester@mail.com', password='password')
+        self.masters   = [
+            Master.objects.create(
+                user       = User.objects.create(name='고수', email=f'master{i}@mail.com', password='password', is_master=True, profile_image=f'http://image/{i}'),
+                birthdate  = datetime.strptime('19901103', '%Y%m%d').date(),
+                subregions = self.subregion,
+            ) for i in range(2)
+        ]
+        self.headers = {"HTTP_Authorization" : access_token(self.requester.id)}
+
+    def create_requests(self, count):
+        for _ in range(count):
+            new_request = Request.objects.create(
+                user       = self.requester,
+                service    = self.service,
+                subregion  = self.subregion,
+                expired_at = datetime.now()+timedelta(days=7),
+            )
+            for master in self.masters:
+                RequestMasterMatch.objects.create(request=new_request, master=master)
+
+    def test_quotation_list_paginated_success(self):
+        self.create_requests(3)
+        first  = client.get('/services/quotationList', {'limit':2}, **self.headers).json()
+        second = client.get('/services/quotationList', {'limit':2, 'cursor':first['nextCursor']}, **self.headers).json()
+
+        self.assertEqual([each['requestId'] for each in first['allQuotations']], [3, 2])
+        self.assertEqual([each['requestId'] for each in second['allQuotations']], [1])
+        self.assertEqual(second['nextCursor'], None)
+        self.assertEqual(first['allQuotations'][0]['service'], 'TestService')
+        self.assertEqual(first['allQuotations'][0]['masterImage'], [
+            {'masterId':1, 'masterImageUrl':'http://image/0'},
+            {'masterId':2, 'masterImageUrl':'http://image/1'},
+        ])
+
+    def test_quotation_list_query_count_is_constant(self):
+        self.create_requests(1)
+        client.get('/services/quotationList', **self.headers)
+        with CaptureQueriesContext(connection) as few:
+            client.get('/services/quotationList', **self.headers)
+
+        self.create_requests(10)
+        with CaptureQueriesContext(connection) as many:
+            response = client.get('/services/quotationList', **self.headers)
+
+        self.assertEqual(len(response.json()['allQuotations']), 11)
+        self.assertEqual(len(few), len(many))
+
+class DetailQuotationListViewTest(TransactionTestCase):
+    reset_sequences = True
+    def setUp(self):
+        subregion   = SubRegion.objects.create(region=Region.objects.create(name='서울특별시'), name='광진구')
+        service     = Service.objects.create(category=Category.objects.create(name='TestCategory'), name='TestService', image_url='http://image')
+        requester   = User.objects.create(name='요청자', email='requester@mail.com', password='password')
+        hourly      = PricingMethod.objects.create(name='시간당')
+        fixed       = PricingMethod.objects.create(name='건당')
+        new_request = Request.objects.create(
+            user       = requester,
+            service    = service,
+            subregion  = subregion,
+            expired_at = datetime.now()+timedelta(days=7),
+        )
+        offers = [
+            (30000, hourly, 4.5, 10, 1),
+            (10000, fixed, 3.0, 2, 5),
+            (20000, hourly, 5.0, 4, 0),
+        ]
+        for i, (price, method, rating, reviews, hires) in enumerate(offers):
+            master = Master.objects.create(
+                user       = User.objects.create(name=f'고수{i}', email=f'master{i}@mail.com', password='password', is_master=True),
+                birthdate  = datetime.strptime('19901103', '%Y%m%d').date(),
+                subregions = subregion,
+            )
+            MasterStats.objects.filter(master=master).update(rating_avg=rating, review_count=reviews, hire_count=hires)
+            match = RequestMasterMatch.objects.create(request=new_request, master=master)
+            Quotation.objects.create(match=match, price=price, pricing_method=method)
+            Quotation.objects.create(match=match, price=price*2, pricing_method=method)
+
+        self.headers = {"HTTP_Authorization" : access_token(requester.id)}
+
+    def master_ids(self, **params):
+        response = client.get('/services/detailQuotationList', {'requestId':1, **params}, **self.headers)
+        return [each['masterId'] for each in response.json()['RECEIVED_QUOTATION']]
+
+    def test_detail_quotation_list_sorted_success(self):
+        self.assertEqual(self.master_ids(sort='price'), [2, 3, 1])
+        self.assertEqual(self.master_ids(sort='rating'), [3, 1, 2])
+        self.assertEqual(self.master_ids(sort='reviews'), [1, 3, 2])
+        self.assertEqual(self.master_ids(sort='hires'), [2, 1, 3])
+
+    def test_detail_quotation_list_filtered_success(self):
+        self.assertEqual(self.master_ids(pricingMethod='시간당', sort='price'), [3, 1])
+        self.assertEqual(self.master_ids(maxPrice='20000', sort='-price'), [3, 2])
+
+    def test_detail_quotation_list_first_quotation_success(self):
+        response = client.get('/services/detailQuotationList', {'requestId':1}, **self.headers).json()
+        proposal = response['RECEIVED_QUOTATION'][0]
+
+        self.assertEqual(float(proposal.pop('price')), 30000)
+        self.assertEqual(proposal, {
+            'masterId'       : 1,
+            'masterName'     : '고수0',
+            'masterImageUrl' : None,
+            'reviewCount'    : 10,
+            'avgRating'      : 4.5,
+            'pricingMethod'  : '시간당',
+            'total_hired'    : 1,
+        })
+
+    def test_detail_quotation_list_query_count_is_constant(self):
+        self.master_ids()
+        with CaptureQueriesContext(connection) as sorted_page:
+            self.master_ids(sort='price', pricingMethod='시간당')
+
+        with CaptureQueriesContext(connection) as plain_page:
+            self.master_ids()
+
+        self.assertEqual(len(sorted_page), len(plain_page))
+
+    def test_detail_quotation_list_invalid_max_price(self):
+        response = client.get('/services/detailQuotationList', {'requestId':1, 'maxPrice':'abc'}, **self.headers)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_quotation_list_non_finite_max_price(self):
+        for max_price in ['NaN', 'Infinity', '-inf']:
+            response = client.get('/services/detailQuotationList', {'requestId':1, 'maxPrice':max_price}, **self.headers)
+
+            self.assertEqual(response.status_code, 400)
+
+class AcceptQuotationViewTest(TransactionTestCase):
+    reset_sequences = True
+    def setUp(self):
+        cache.clear()
+        subregion   = SubRegion.objects.create(region=Region.objects.create(name='서울특별시'), name='광진구')
+        service     = Service.objects.create(category=Category.objects.create(name='TestCategory'), name='TestService')
+        requester   = User.objects.create(name='요청자', email='requester@mail.com', password='password')
+        method      = PricingMethod.objects.create(name='시간당')
+        new_request = Request.objects.create(
+            user       = requester,
+            service    = service,
+            subregion  = subregion,
+            expired_at = datetime.now()+timedelta(days=7),
+        )
+        for i in range(2):
+            master = Master.objects.create(
+                user       = User.objects.create(name='고수', email=f'master{i}@mail.com', password='password', is_master=True),
+                birthdate  = datetime.strptime('19901103', '%Y%m%d').date(),
+                subregions = subregion,
+            )
+            match = RequestMasterMatch.objects.create(request=new_request, master=master)
+            Quotation.objects.create(match=match, price=10000, pricing_method=method)
+
+        self.headers = {"HTTP_Authorization" : access_token(requester.id)}
+
+    def test_accept_quotation_success(self):
+        response = client.post('/services/acceptQuotation?quotationId=2', **self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'MESSAGE':'QUOTATION_ACCEPTED'})
+        self.assertEqual(list(Quotation.objects.order_by('id').values_list('is_employed', flat=True)), [False, True])
+        self.assertIsNotNone(Request.objects.get(id=1).closed_at)
+        self.assertEqual(list(MasterStats.objects.order_by('master_id').values_list('hire_count', flat=True)), [0, 1])
+
+    def test_accept_quotation_closes_request(self):
+        client.post('/services/acceptQuotation?quotationId=2', **self.headers)
+        response = client.post('/services/acceptQuotation?quotationId=1', **self.headers)
+        headers  = {"HTTP_Authorization" : access_token(2)}
+        resent   = client.post(
+            '/services/quotations',
+            json.dumps({'quotations':[{'requestId':1, 'price':5000, 'pricingMethod':'시간당'}]}),
+            content_type='application/json',
+            **headers
+        )
+
+        self.assertEqual(response.json(), {'MESSAGE':'REQUEST_CLOSED'})
+        self.assertEqual(resent.json()['results'], [{'requestId':1, 'MESSAGE':'REQUEST_CLOSED'}])
+        self.assertEqual(Quotation.objects.filter(is_employed=True).count(), 1)
+
+    def test_accept_quotation_of_other_user(self):
+        headers  = {"HTTP_Authorization" : access_token(2)}
+        response = client.post('/services/acceptQuotation?quotationId=1', **headers)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'MESSAGE':'QUOTATION_DOES_NOT_EXISTS'})
+
+    def test_accept_quotation_releases_unanswered_matches(self):
+        master = Master.objects.create(
+            user       = User.objects.create(name='고수', email='silent@mail.com', password='password', is_master=True),
+            birthdate  = datetime.strptime('19901103', '%Y%m%d').date(),
+            subregions = SubRegion.objects.get(id=1),
+        )
+        RequestMasterMatch.objects.create(request_id=1, master=master)
+        MasterCapacity.objects.create(master=master, day=datetime.now().date(), open_matches=2)
+        MasterCapacity.objects.create(master_id=1, day=datetime.now().date(), open_matches=1)
+
+        client.post('/services/acceptQuotation?quotationId=2', **self.headers)
+
+        self.assertEqual(MasterCapacity.objects.get(master=master).open_matches, 1)
+        self.assertEqual(MasterCapacity.objects.get(master_id=1).open_matches, 1)
+
+    def test_rebuild_open_matches_counts_live_unanswered_requests(self):
+        master  = Master.objects.get(id=1)
+        expired = Request.objects.create(
+            user       = User.objects.get(id=1),
+            service    = Service.objects.get(id=1),
+            subregion  = SubRegion.objects.get(id=1),
+            expired_at = datetime.now()-timedelta(days=1),
+        )
+        live    = Request.objects.create(
+            user       = User.objects.get(id=1),
+            service    = Service.objects.get(id=1),
+            subregion  = SubRegion.objects.get(id=1),
+            expired_at = datetime.now()+timedelta(days=1),
+        )
+        RequestMasterMatch.objects.create(request=expired, master=master)
+        RequestMasterMatch.objects.create(request=live, master=master)
+        MasterCapacity.objects.create(master=master, day=datetime.now().date(), open_matches=5)
+        MasterCapacity.objects.create(master_id=2, day=datetime.now().date(), open_matches=5)
+        out = StringIO()
+        call_command('rebuild_master_capacity', stdout=out)
+
+        self.assertEqual(list(MasterCapacity.objects.order_by('master_id').values_list('open_matches', flat=True)), [1, 0])
+        self.assertIn('2 master capacities rebuilt', out.getvalue())
+
+class BulkQuotationViewTest(TransactionTestCase):
+    reset_sequences = True
+    def setUp(self):
+        cache.clear()
+        subregion = SubRegion.objects.create(region=Region.objects.create(name='서울특별시'), name='광진구')
+        service   = Service.objects.create(category=Category.objects.create(name='TestCategory'), name='TestService')
+        user      = User.objects.create(name='고수', email='master@mail.com', password='password', is_master=True)
+        requester = User.objects.create(name='요청자', email='requester@mail.com', password='password')
+        master    = Master.objects.create(
+            user       = user,
+            birthdate  = datetime.strptime('19901103', '%Y%m%d').date(),
+            subregions = subregion,
+        )
+        PricingMethod.objects.create(name='시간당')
+        for i in range(4):
+            new_request = Request.objects.create(
+                user       = requester,
+                service    = service,
+                subregion  = subregion,
+                expired_at = datetime.now()+timedelta(days=7),
+            )
+            if i < 3:
+                RequestMasterMatch.objects.create(request=new_request, master=master, request_created_at=new_request.created_at)
+        MasterCapacity.objects.create(master=master, day=datetime.now().date(), open_matches=3)
+
+        self.headers = {"HTTP_Authorization" : access_token(user.id)}
+
+    def post(self, quotations):
+        return client.post('/services/quotations', json.dumps({'quotations':quotations}), content_type='application/json', **self.headers)
+
+    def test_bulk_quotations_per_item_results(self):
+        response = self.post([
+            {'requestId':1, 'price':10000, 'pricingMethod':'시간당'},
+            {'requestId':2, 'price':'abc', 'pricingMethod':'시간당'},
+            {'requestId':2, 'price':5000, 'pricingMethod':'건당'},
+            {'requestId':4, 'price':5000, 'pricingMethod':'시간당'},
+            {'requestId':1, 'price':9000, 'pricingMethod':'시간당'},
+            {'price':9000},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'requestId':1, 'MESSAGE':'QUOTATION_SENT'},
+            {'requestId':2, 'MESSAGE':'INVALID_PRICE'},
+            {'requestId':2, 'MESSAGE':'PRICING_METHOD_DOES_NOT_EXISTS'},
+            {'requestId':4, 'MESSAGE':'REQUEST_NOT_MATCHED'},
+            {'requestId':1, 'MESSAGE':'DUPLICATED_REQUEST'},
+            {'requestId':None, 'MESSAGE':'KEY_ERROR'},
+        ])
+        self.assertEqual(list(Quotation.objects.values_list('match__request_id', 'price')), [(1, 10000)])
+        self.assertEqual(MasterCapacity.objects.get(master_id=1).open_matches, 2)
+        self.assertEqual(Badge.objects.get(user_id=2).new_quotations, 1)
+
+    def test_bulk_quotations_non_finite_price(self):
+        response = self.post([
+            {'requestId':1, 'price':'NaN', 'pricingMethod':'시간당'},
+            {'requestId':2, 'price':'Infinity', 'pricingMethod':'시간당'},
+            {'requestId':3, 'price':'-sNaN', 'pricingMethod':'시간당'},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['MESSAGE'] for result in response.json()['results']], ['INVALID_PRICE'] * 3)
+        self.assertFalse(Quotation.objects.exists())
+
+    def test_bulk_quotations_query_count_is_constant(self):
+        self.post([{'requestId':1, 'price':10000, 'pricingMethod':'시간당'}])
+
+        with CaptureQueriesContext(connection) as one:
+            self.post([{'requestId':2, 'price':10000, 'pricingMethod':'시간당'}])
+
+        with CaptureQueriesContext(connection) as many:
+            self.post([{'requestId':3, 'price':10000, 'pricingMethod':'시간당'}, {'requestId':1, 'price':9000, 'pricingMethod':'시간당'}])
+
+        self.assertEqual(len(one), len(many))
+        self.assertEqual(MasterCapacity.objects.get(master_id=1).open_matches, 0)
+        self.assertEqual(Quotation.objects.count(), 4)
+
+    def test_bulk_quotations_too_many(self):
+        response = self.post([{'requestId':1, 'price':10000, 'pricingMethod':'시간당'}] * 101)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE':'TOO_MANY_QUOTATIONS'})
+
+class QuotationImageViewTest(TransactionTestCase):
+    reset_sequences = True
+    def setUp(self):
+        subregion = SubRegion.objects.create(region=Region.objects.create(name='서울특별시'), name='광진구')
+        service   = Service.objects.create(category=Category.objects.create(name='TestCategory'), name='TestService')
+        user      = User.objects.create(name='고수', email='master@mail.com', password='password', is_master=True)
+        requester = User.objects.create(name='요청자', email='requester@mail.com', password='password')
+        master    = Master.objects.create(
+            user       = user,
+            birthdate  = datetime.strptime('19901103', '%Y%m%d').date(),
+            subregions = subregion,
+        )
+        new_request = Request.objects.create(
+            user       = requester,
+            service    = service,
+            subregion  = subregion,
+            expired_at = datetime.now()+timedelta(days=7),
+        )
+        Quotation.objects.create(
+            match          = RequestMasterMatch.objects.create(request=new_request, master=master),
+            price          = 10000,
+            pricing_method = PricingMethod.objects.create(name='시간당'),
+        )
+
+        self.media   = tempfile.TemporaryDirectory()
+        self.headers = {"HTTP_Authorization" : access_token(user.id)}
+        self.storage = override_settings(QUOTATION_IMAGE_STORAGE_OPTIONS={'root':self.media.name, 'base_url':'/media'})
+        self.storage.enable()
+        reset_storage()
+
+    def tearDown(self):
+        self.storage.disable()
+        reset_storage()
+        self.media.cleanup()
+
+    def test_upload_quotation_images_success(self):
+        response = client.post('/services/quotationImages?quotationId=1', {'images':[
+            SimpleUploadedFile('photo.png', b'png-bytes', content_type='image/png'),
+            SimpleUploadedFile('notes.txt', b'text', content_type='text/plain'),
+        ]}, **self.headers)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['rejected'], ['notes.txt'])
+        image_url = QuotationImage.objects.get(quotation_id=1).image_url
+        self.assertEqual(response.json()['images'][0]['imageUrl'], image_url)
+        with open(os.path.join(self.media.name, *image_url[len('/media/'):].split('/')), 'rb') as stored:
+            self.assertEqual(stored.read(), b'png-bytes')
+
+    @unittest.skipIf(uploads.Image is None, 'Pillow is not installed')
+    def test_upload_quotation_images_thumbnail(self):
+        png = BytesIO()
+        uploads.Image.new('RGB', (640, 480), 'red').save(png, 'PNG')
+        response = client.post('/services/quotationImages?quotationId=1', {'images':[
+            SimpleUploadedFile('photo.png', png.getvalue(), content_type='image/png'),
+        ]}, **self.headers)
+
+        self.assertEqual(response.status_code, 201)
+        thumbnail_url = QuotationImage.objects.get(quotation_id=1).thumbnail_url
+        self.assertEqual(response.json()['images'][0]['thumbnailUrl'], thumbnail_url)
+        with uploads.Image.open(os.path.join(self.media.name, *thumbnail_url[len('/media/'):].split('/'))) as thumbnail:
+            self.assertEqual(thumbnail.format, 'JPEG')
+            self.assertLessEqual(max(thumbnail.size), 320)
+
+    def test_upload_quotation_images_failure_removes_files(self):
+        with patch.object(QuotationImage.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                client.post('/services/quotationImages?quotationId=1', {'images':[
+                    SimpleUploadedFile('photo.png', b'png-bytes', content_type='image/png'),
+                ]}, **self.headers)
+
+        self.assertFalse(QuotationImage.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media.name, 'quotations', '1')), [])
+
+    @override_settings(QUOTATION_IMAGE_MAX_SIZE=4)
+    def test_upload_quotation_images_too_large(self):
+        response = client.post('/services/quotationImages?quotationId=1', {'images':[
+            SimpleUploadedFile('photo.png', b'png-bytes', content_type='image/png'),
+        ]}, **self.headers)
+
+        self.assertEqual(response.json()['rejected'], ['photo.png'])
+        self.assertFalse(QuotationImage.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media.name, 'quotations', '1')), [])
+
+    def test_upload_quotation_images_not_owner(self):
+        response = client.post('/services/quotationImages?quotationId=2', {'images':[]}, **self.headers)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'MESSAGE':'QUOTATION_DOES_NOT_EXISTS'})
@@ -0,0 +1,104 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io                 import BytesIO
+
+from django.conf                     import settings
+from django.core.files.uploadedfile  import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+from services.storage import new_key, thumbnail_key
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+class StoredFile(UploadedFile):
+    def __init__(self, key, url, name, content_type, size):
+        super().__init__(file=None, name=name, content_type=content_type, size=size)
+        self.key = key
+        self.url = url
+
+class StorageUploadHandler(FileUploadHandler):
+    """
+    Streams every multipart chunk straight into a storage upload instead of memory or a temp file.
+    Files that are not images or grow past max_size are aborted and reported in rejected.
+    """
+    def __init__(self, storage, prefix, max_size, request=None):
+        super().__init__(request)
+        self.storage  = storage
+        self.prefix   = prefix
+        self.max_size = max_size
+        self.upload   = None
+        self.rejected = []
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+
+        if not content_type.startswith('image/'):
+            self.rejected.append(file_name)
+            raise SkipFile()
+
+        self.key    = new_key(self.prefix, file_name)
+        self.upload = self.storage.open_upload(self.key, content_type)
+        self.size   = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+
+        if self.size > self.max_size:
+            self.upload_interrupted()
+            self.rejected.append(self.file_name)
+            raise SkipFile()
+
+        self.upload.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.upload.complete()
+        self.upload = None
+        return StoredFile(self.key, self.storage.url(self.key), self.file_name, self.content_type, file_size)
+
+    def upload_interrupted(self):
+        if self.upload:
+            self.upload.abort()
+            self.upload = None
+
+def make_thumbnail(storage, key):
+    if Image is None:
+        return None
+
+    size = getattr(settings, 'QUOTATION_THUMBNAIL_SIZE', (320, 320))
+    try:
+        with Image.open(BytesIO(storage.read(key))) as image:
+            image.thumbnail(size)
+            thumbnail = BytesIO()
+            image.convert('RGB').save(thumbnail, 'JPEG', quality=85)
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+        return None
+
+    storage.save(thumbnail_key(key), thumbnail.getvalue(), 'image/jpeg')
+    return storage.url(thumbnail_key(key))
+
+_executor      = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers        = getattr(settings, 'QUOTATION_THUMBNAIL_WORKERS', 4),
+                    thread_name_prefix = 'thumbnail',
+                )
+
+    return _executor
+
+def make_thumbnails(storage, keys):
+    return list(get_executor().map(lambda key: make_thumbnail(storage, key), keys))
+
+def discard(storage, keys):
+    for key in keys:
+        storage.delete(key)
+        storage.delete(thumbnail_key(key))
@@ -12,6 +12,10 @@ urlpatterns = [
      path('/receivedRequest', views.ReceivedRequestListView.as_view()),
      path('/requestDetail', views.ReceivedRequestDetailView.as_view()),
      path('/createQuotation', views.QuotationView.as_view()),
+     path('/quotations', views.BulkQuotationView.as_view()),
+     path('/quotationImages', views.QuotationImageView.as_view()),
+     path('/acceptQuotation', views.AcceptQuotationView.as_view()),
+     path('/streamTicket', views.StreamTicketView.as_view()),
      path('/quotationList', views.QuotationListView.as_view()),
      path('/detailQuotationList', views.DetailQuotationListView.as_view()),
 ]
@@ -1,3 +1,5 @@
+import base64
+import json
 from datetime import datetime
 
 def get_date(date):
@@ -7,4 +9,17 @@ def get_date(date):
     elif date.month == time.month:
         return str(time.day - date.day) + "일 전"
     elif date.year == time.year:
-        return str(time.month - date.month) + "달 전"
\ No newline at end of file
+        return str(time.month - date.month) + "달 전"
+
+def encode_cursor(*values):
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor, *converters):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(converters):
+            raise ValueError('INVALID_CURSOR')
+        return [convert(value) for convert, value in zip(converters, values)]
+    except TypeError:
+        raise ValueError('INVALID_CURSOR')
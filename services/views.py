@@ -4,16 +4,73 @@ import boto3
 import my_settings
 from datetime import datetime 
 
-from django.http        import JsonResponse
-from django.views       import View
-from django.db.models   import Avg
-
-from operator           import itemgetter
-from services.utils     import get_date
-from datetime           import datetime, timedelta
-from users.utils        import login_required, master_required
-from services.models    import Service, Category, Quotation, Request, RequestMasterMatch, PricingMethod, Question, SelectedChoice, QuestionChoice
-from users.models       import Region, SubRegion, MasterService, Review, Master
+from django.conf                import settings
+from django.http                import JsonResponse
+from django.views               import View
+from django.db                  import transaction
+from django.db.models           import Avg, F, Q, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.utils               import timezone
+
+from operator            import itemgetter
+from services.utils      import get_date, encode_cursor, decode_cursor
+from services.matching   import match_request
+from services.jobs       import enqueue_matching
+from services.summaries  import summarize, get_summary, choices_string, get_request_detail, invalidate_request_detail
+from services.events     import publish_on_commit, user_channel
+from services.quotations import submit_quotations, accept_quotation, parse_price
+from services.storage    import get_storage
+from services.uploads    import StorageUploadHandler, make_thumbnails, discard
+from datetime            import datetime, timedelta
+from users.utils         import login_required, master_required
+from users.auth          import issue_stream_ticket
+from services.models     import Service, Category, Quotation, QuotationImage, Request, RequestMasterMatch, PricingMethod, Question, SelectedChoice, QuestionChoice
+from users.models        import Region, SubRegion, MasterService, Review
+from users.capacity      import release_match
+from users.badges        import add_new_quotation, clear
+
+def is_choice_id(entry):
+    return isinstance(entry, int) and not isinstance(entry, bool)
+
+def is_choice_pair(entry):
+    return isinstance(entry, dict) and is_choice_id(entry.get('questionId')) and isinstance(entry.get('choice'), str)
+
+def resolve_choices(entries):
+    """
+    Maps each answer to its QuestionChoice in one query. An answer is a choice id,
+    a {'questionId', 'choice'} pair, or a bare choice text that only one question uses.
+    """
+    for entry in entries:
+        if not (is_choice_id(entry) or isinstance(entry, str) or is_choice_pair(entry)):
+            raise QuestionChoice.DoesNotExist(entry)
+
+    ids     = [entry for entry in entries if is_choice_id(entry)]
+    texts   = [entry['choice'] if isinstance(entry, dict) else entry for entry in entries if not is_choice_id(entry)]
+    by_id   = {}
+    by_pair = {}
+    by_text = {}
+    for question_choice in QuestionChoice.objects.select_related('question').filter(Q(id__in=ids) | Q(choice__in=texts)):
+        by_id[question_choice.id]                                     = question_choice
+        by_pair[(question_choice.question_id, question_choice.choice)] = question_choice
+        by_text.setdefault(question_choice.choice, []).append(question_choice)
+
+    chosen_list = []
+    for entry in entries:
+        if is_choice_id(entry):
+            chosen = by_id.get(entry)
+        elif isinstance(entry, dict):
+            chosen = by_pair.get((entry['questionId'], entry['choice']))
+        else:
+            candidates = by_text.get(entry, [])
+            if len(candidates) > 1:
+                raise QuestionChoice.MultipleObjectsReturned(entry)
+            chosen = candidates[0] if candidates else None
+
+        if chosen is None:
+            raise QuestionChoice.DoesNotExist(entry)
+        chosen_list.append(chosen)
+
+    return chosen_list
 
 class CategoryView(View):
     def get(self, request):
@@ -114,19 +171,21 @@ class RequestView(View):
             which_user    = getattr(request,'user')
             service_id    = request.GET['serviceId']
             which_service = Service.objects.get(id=service_id)
-            which_region  = SubRegion.objects.get(name=data["region"])
-            new_request   = Request.objects.create(
-                user       = which_user,
-                service    = which_service,
-                subregion  = which_region,
-                expired_at = datetime.now()+timedelta(days=7),
-            )
-
-            for chosen in data['choices']:
-                SelectedChoice.objects.create(
-                    request = new_request,
-                    choice  = QuestionChoice.objects.get(choice=chosen),
-                    )
+            which_region  = SubRegion.objects.select_related('region').get(name=data["region"])
+            chosen_list   = resolve_choices(data['choices'])
+
+            with transaction.atomic():
+                new_request = Request.objects.create(
+                    user       = which_user,
+                    service    = which_service,
+                    subregion  = which_region,
+                    expired_at = datetime.now()+timedelta(days=7),
+                )
+                SelectedChoice.objects.bulk_create([
+                    SelectedChoice(request=new_request, choice=chosen) for chosen in chosen_list
+                ])
+                summarize(new_request, chosen_list).save()
+                enqueue_matching(new_request)
 
             return JsonResponse({'MESSAGE':'REQUEST_MADE_SUCCESSFUL',"requestId":new_request.id},status= 200)
        
@@ -134,6 +193,12 @@ class RequestView(View):
             return JsonResponse({'MESSAGE': 'KEY_ERROR_OCCURED'},status=400)
         except Service.DoesNotExist:
             return JsonResponse({'MESSAGE':'SERVICE_DOES_NOT_EXISTS'},status=404)
+        except SubRegion.DoesNotExist:
+            return JsonResponse({'MESSAGE':'REGION_DOES_NOT_EXISTS'},status=404)
+        except QuestionChoice.DoesNotExist:
+            return JsonResponse({'MESSAGE':'CHOICE_DOES_NOT_EXISTS'},status=400)
+        except QuestionChoice.MultipleObjectsReturned:
+            return JsonResponse({'MESSAGE':'AMBIGUOUS_CHOICE'},status=400)
 
 
 class RequestDistributionView(View):
@@ -142,25 +207,9 @@ class RequestDistributionView(View):
             service_id      = request.GET['serviceId']
             request_id      = request.GET['requestId']
             which_service   = Service.objects.get(id=service_id)
-            which_request   = Request.objects.get(id=request_id)
-            master_services = MasterService.objects.filter(service = which_service)
-            
-            priority_count = 0
-            for candidate in master_services:
-                if candidate.master.subregions == which_request.subregion:
-                    priority_count += 2
-                if candidate.master.subregions.region == which_request.subregion.region:
-                    priority_count += 1
-                if candidate.is_main:
-                    priority_count += 1
-                if candidate.master.user.gender == which_request.choices.get(question_id=2):
-                    priority_count += 1
-
-                RequestMasterMatch.objects.create(
-                    request  = which_request,
-                    master   = candidate.master,
-                    priority = priority_count,
-                )
+            which_request   = Request.objects.select_related('subregion').get(id=request_id, service=which_service)
+
+            match_request(which_request)
             matches_count = RequestMasterMatch.objects.filter(request=which_request).count()
 
             return JsonResponse({'MESSAGE':'REQUEST_MATCHED_SUCCESSFUL', 'Matched_Master':matches_count},status= 200)
@@ -175,66 +224,76 @@ class RequestDistributionView(View):
 class ReceivedRequestListView(View):
     @master_required
     def get(self, request):
-        which_user     = getattr(request,'user')
-        master         = Master.objects.get(user=which_user)
-        received_all   = RequestMasterMatch.objects.filter(master=master)
-        received_lists =[]
-
-        for received in received_all:
-            question_choices = received.request.selectedchoice_set.all()
-            choices_string   = ''
-            for choice in question_choices:
-                choices_string += str(choice.choice.choice)+','
-            create_time = received.request.created_at
-            expire_date = received.request.expired_at
+        try:
+            limit        = min(max(int(request.GET.get('limit', 20)), 1), 100)
+            cursor       = request.GET.get('cursor')
+            is_ranked    = request.GET.get('sort') == 'priority'
+            received_all = RequestMasterMatch.objects.filter(master_id=request.master_id)\
+                                                     .select_related('request__summary')
+
+            if is_ranked:
+                received_all = received_all.filter(request__expired_at__gt=timezone.now())\
+                                           .order_by('-priority', '-request_created_at', '-id')
+                if cursor:
+                    priority, created_at, match_id = decode_cursor(cursor, int, datetime.fromisoformat, int)
+                    received_all                   = received_all.filter(
+                        Q(priority__lt=priority)
+                        | Q(priority=priority, request_created_at__lt=created_at)
+                        | Q(priority=priority, request_created_at=created_at, id__lt=match_id)
+                    )
+            else:
+                received_all = received_all.order_by('-request_created_at', '-id')
+                if cursor:
+                    created_at, match_id = decode_cursor(cursor, datetime.fromisoformat, int)
+                    received_all         = received_all.filter(
+                        Q(request_created_at__lt=created_at) | Q(request_created_at=created_at, id__lt=match_id)
+                    )
+
+            if not cursor:
+                clear('new_requests', request.user_id)
+
+            page        = list(received_all[:limit+1])
+            next_cursor = None
+            if len(page) > limit:
+                last        = page[limit-1]
+                next_cursor = encode_cursor(last.priority, last.request_created_at, last.id) if is_ranked\
+                              else encode_cursor(last.request_created_at, last.id)
             now         = datetime.now()
-            is_expired  = now.date() < expire_date.date()
-            full_region = received.request.subregion.region.name+' '+received.request.subregion.name
-            
-            each_request = {
-                'requestId'      : received.request.id,
-                'requester'      : received.request.user.name,
-                'requesterImage' : received.request.user.profile_image,
-                'service'        : received.request.service.name,
-                'region'         : full_region,
-                'choices'        : choices_string,
-                'expiredAt'      : is_expired,
-                'timeAgo'        : get_date(create_time),
-                'createdAt'      : received.request.created_at,
-            }
-            received_lists.append(each_request)
-            received_list = sorted(received_lists, key=itemgetter('createdAt'), reverse =True)
-    
-        return JsonResponse({'receivedRequests':received_list},status= 200)
+
+            received_list = []
+            for received in page[:limit]:
+                summary = get_summary(received.request)
+                received_list.append({
+                    'requestId'      : received.request.id,
+                    'requester'      : summary.requester_name,
+                    'requesterImage' : summary.requester_image,
+                    'service'        : summary.service_name,
+                    'region'         : summary.region_name,
+                    'choices'        : choices_string(summary),
+                    'expiredAt'      : now.date() < received.request.expired_at.date(),
+                    'timeAgo'        : get_date(received.request.created_at),
+                    'createdAt'      : received.request.created_at,
+                    'priority'       : received.priority,
+                })
+
+            return JsonResponse({'receivedRequests':received_list, 'nextCursor':next_cursor},status= 200)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR_OCCURED'},status=400)
     
 
 class ReceivedRequestDetailView(View):
     @master_required
     def get(self, request):
         try:
-            which_request = request.GET['requestId']
-            request       = Request.objects.get(id=which_request)
-            full_region   = request.subregion.region.name+' '+request.subregion.name
-            match         = RequestMasterMatch.objects.filter(request = request).count()
-            request_detail = [{
-                    'requester'           : request.user.name,
-                    'requesterImage'      : request.user.profile_image,
-                    'service'             : request.service.name,
-                    'region'              : full_region,
-                    'receivedQuotations'  : match,
-                }
-            ]
-            questions     = SelectedChoice.objects.filter(request=request)
-            question_list =[{
-                "question": question.choice.question.name,
-                "choice"  : question.choice.choice,
-            } for question in questions]
-            details       = request_detail+question_list
+            details = get_request_detail(int(request.GET['requestId']))
 
             return JsonResponse({'requestDetail':details},status= 200)
             
         except KeyError:
             return JsonResponse({'MESSAGE': 'KEY_ERROR_OCCURED'},status=400)    
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR_OCCURED'},status=400)
         except Request.DoesNotExist:
             return JsonResponse({'MESSAGE':'REQUEST_DOES_NOT_EXISTS'},status=404)
 
@@ -244,15 +303,34 @@ class QuotationView(View):
         try:
             data          = json.loads(request.body)
             which_request = request.GET['requestId']
-            which_user    = getattr(request,'user')
-            which_master  = Master.objects.get(user=which_user)
-            matched       = RequestMasterMatch.objects.get(request=which_request, master=which_master)
+            master_id     = request.master_id
+            matched       = RequestMasterMatch.objects.select_related('request').get(request=which_request, master_id=master_id)
             which_method  = PricingMethod.objects.get(name=data['pricingMethod'])
-            Quotation.objects.create(
-                match          = matched,
-                price          = data['price'],
-                pricing_method = which_method,
-            )
+
+            with transaction.atomic():
+                closed_at = Request.objects.select_for_update().values_list('closed_at', flat=True).get(id=matched.request_id)
+
+                if closed_at:
+                    return JsonResponse({"MESSAGE":"REQUEST_CLOSED"},status=400)
+
+                is_first = not matched.quotation_set.exists()
+                Quotation.objects.create(
+                    match          = matched,
+                    price          = data['price'],
+                    pricing_method = which_method,
+                )
+
+                if is_first:
+                    release_match(master_id)
+
+                add_new_quotation(matched.request.user_id)
+
+                publish_on_commit([(user_channel(matched.request.user_id), {
+                    'type'      : 'quotation',
+                    'requestId' : matched.request_id,
+                    'masterId'  : master_id,
+                    'price'     : data['price'],
+                })])
 
             return JsonResponse({"MESSAGE":"QUOTATION_SENT"},status= 200)
         
@@ -263,60 +341,203 @@ class QuotationView(View):
             return JsonResponse({"MESSAGE":"REQUEST_DOES_NOT_EXISTS"},status=404)
 
 
+class BulkQuotationView(View):
+    MAX_QUOTATIONS = 100
+
+    @master_required
+    def post(self, request):
+        try:
+            data    = json.loads(request.body)
+            entries = data['quotations']
+
+            if not isinstance(entries, list):
+                return JsonResponse({"MESSAGE": "KEY_ERROR_OCCURED"},status=400)
+
+            if len(entries) > self.MAX_QUOTATIONS:
+                return JsonResponse({"MESSAGE": "TOO_MANY_QUOTATIONS"},status=400)
+
+            results = submit_quotations(request.master_id, entries)
+
+            return JsonResponse({"MESSAGE":"QUOTATIONS_PROCESSED", "results":results},status= 200)
+
+        except KeyError:
+            return JsonResponse({"MESSAGE": "KEY_ERROR_OCCURED"},status=400)
+
+        except json.decoder.JSONDecodeError:
+            return JsonResponse({"MESSAGE": "JSON_DECODE_ERROR"},status=400)
+
+
+class StreamTicketView(View):
+    @login_required
+    def post(self, request):
+        return JsonResponse({'ticket':issue_stream_ticket(request.user_id)},status=200)
+
+class AcceptQuotationView(View):
+    @login_required
+    def post(self, request):
+        try:
+            if not accept_quotation(request.user_id, request.GET['quotationId']):
+                return JsonResponse({"MESSAGE":"REQUEST_CLOSED"},status=400)
+
+            return JsonResponse({"MESSAGE":"QUOTATION_ACCEPTED"},status= 200)
+
+        except KeyError:
+            return JsonResponse({"MESSAGE": "KEY_ERROR_OCCURED"},status=400)
+
+        except ValueError:
+            return JsonResponse({"MESSAGE": "VALUE_ERROR_OCCURED"},status=400)
+
+        except Quotation.DoesNotExist:
+            return JsonResponse({"MESSAGE":"QUOTATION_DOES_NOT_EXISTS"},status=404)
+
+
+class QuotationImageView(View):
+    @master_required
+    def post(self, request):
+        try:
+            quotation = Quotation.objects.get(id=request.GET['quotationId'], match__master_id=request.master_id)
+            storage   = get_storage()
+            handler   = StorageUploadHandler(
+                storage,
+                f'quotations/{quotation.id}',
+                getattr(settings, 'QUOTATION_IMAGE_MAX_SIZE', 10 * 1024 * 1024),
+                request,
+            )
+            request.upload_handlers = [handler]
+
+            uploaded = request.FILES.getlist('images')
+            try:
+                thumbnails = make_thumbnails(storage, [image.key for image in uploaded])
+                QuotationImage.objects.bulk_create([
+                    QuotationImage(quotation=quotation, image_url=image.url, thumbnail_url=thumbnail)
+                    for image, thumbnail in zip(uploaded, thumbnails)
+                ])
+            except Exception:
+                discard(storage, [image.key for image in uploaded])
+                raise
+
+            return JsonResponse({
+                'MESSAGE'  : 'IMAGES_UPLOADED',
+                'images'   : [{'imageUrl':image.url, 'thumbnailUrl':thumbnail} for image, thumbnail in zip(uploaded, thumbnails)],
+                'rejected' : handler.rejected,
+            }, status=201)
+
+        except KeyError:
+            return JsonResponse({"MESSAGE": "KEY_ERROR_OCCURED"},status=400)
+
+        except ValueError:
+            return JsonResponse({"MESSAGE": "VALUE_ERROR_OCCURED"},status=400)
+
+        except Quotation.DoesNotExist:
+            return JsonResponse({"MESSAGE":"QUOTATION_DOES_NOT_EXISTS"},status=404)
+
+
 class QuotationListView(View):
     @login_required
     def get(self,request):
         try:
-            which_user    = getattr(request,'user')
-            made_requests = Request.objects.filter(user=which_user)
-            users_quotations=[]
-            for request in made_requests:
-                is_expired     = datetime.now().date() >= request.expired_at.date()
-                matched_master = RequestMasterMatch.objects.filter(request=request)
-
-                all_quotations = {
-                    'requestId'    : request.id,
-                    'service'      : request.service.name,
-                    'createdAt'    : request.created_at.date(),
-                    'expired'      : is_expired,
-                    'masterImage' : [{
-                        'masterId'       : profile.master.id,
-                        'masterImageUrl' : profile.master.user.profile_image,
-                    } for profile in matched_master]
-                }
-                users_quotations.append(all_quotations)
-            return JsonResponse({'allQuotations':users_quotations},status= 200)
+            limit         = min(max(int(request.GET.get('limit', 20)), 1), 100)
+            cursor        = request.GET.get('cursor')
+            matched       = RequestMasterMatch.objects.select_related('master__user')\
+                                                      .only('request_id', 'master_id', 'master__user__profile_image')\
+                                                      .order_by('id')
+            made_requests = Request.objects.filter(user_id=request.user_id)\
+                                           .select_related('service')\
+                                           .prefetch_related(Prefetch('requestmastermatch_set', queryset=matched))\
+                                           .order_by('-created_at', '-id')
+            clear('new_quotations', request.user_id)
+
+            if cursor:
+                created_at, request_id = decode_cursor(cursor, datetime.fromisoformat, int)
+                made_requests          = made_requests.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=request_id)
+                )
+
+            page        = list(made_requests[:limit+1])
+            next_cursor = encode_cursor(page[limit-1].created_at, page[limit-1].id) if len(page) > limit else None
+            today       = datetime.now().date()
+
+            users_quotations = [{
+                'requestId'   : made_request.id,
+                'service'     : made_request.service.name if made_request.service else None,
+                'createdAt'   : made_request.created_at.date(),
+                'expired'     : today >= made_request.expired_at.date(),
+                'masterImage' : [{
+                    'masterId'       : profile.master_id,
+                    'masterImageUrl' : profile.master.user.profile_image,
+                } for profile in made_request.requestmastermatch_set.all()]
+            } for made_request in page[:limit]]
+
+            return JsonResponse({'allQuotations':users_quotations, 'nextCursor':next_cursor},status= 200)
 
         except KeyError:
             return JsonResponse({"MESSAGE": "KEY_ERROR_OCCURED"},status=400)
 
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR_OCCURED'},status=400)
+
 class DetailQuotationListView(View):
+    SORTS = {
+        'price'   : (F('price').asc(nulls_last=True), 'id'),
+        '-price'  : (F('price').desc(nulls_last=True), 'id'),
+        'rating'  : (F('rating_avg').desc(nulls_last=True), 'id'),
+        'reviews' : ('-review_count', 'id'),
+        'hires'   : ('-hire_count', 'id'),
+    }
+
     @login_required
     def get(self,request):
-        from_request    = request.GET['requestId']
-        which_request   = Request.objects.get(id=from_request)
-        matched_all     = RequestMasterMatch.objects.filter(request=from_request)
-        request_detail  = {
-            "serviceName"  : which_request.service.name,
-            "createdAt"    : which_request.created_at,
-            "serviceImage" : which_request.service.image_url,
-        }
-
-        sent_quotation=[]
-        for match in matched_all:
-            price             = match.quotation_set.first().price if match.quotation_set.first() else 0
-            master_rating_avg = Review.objects.filter(master= match.master).aggregate(avg=Avg('rating'))
-    
-            proposal={
+        try:
+            from_request    = request.GET['requestId']
+            sort            = request.GET.get('sort')
+            pricing_method  = request.GET.get('pricingMethod')
+            max_price       = request.GET.get('maxPrice')
+            which_request   = Request.objects.select_related('service').get(id=from_request)
+            first_quotation = Quotation.objects.filter(match=OuterRef('pk')).order_by('id')
+            matched_all     = RequestMasterMatch.objects.filter(request=from_request)\
+                                                    .select_related('master__user')\
+                                                    .annotate(
+                                                        price          = Subquery(first_quotation.values('price')[:1], output_field=Quotation._meta.get_field('price')),
+                                                        pricing_method = Subquery(first_quotation.values('pricing_method__name')[:1]),
+                                                        review_count   = Coalesce('master__stats__review_count', 0),
+                                                        rating_avg     = F('master__stats__rating_avg'),
+                                                        hire_count     = Coalesce('master__stats__hire_count', 0),
+                                                    )
+
+            if pricing_method:
+                matched_all = matched_all.filter(pricing_method=pricing_method)
+
+            if max_price:
+                max_price = parse_price(max_price)
+                if max_price is None:
+                    raise ValueError
+                matched_all = matched_all.filter(price__lte=max_price)
+
+            matched_all    = matched_all.order_by(*self.SORTS.get(sort, ('id',)))
+            request_detail = {
+                "serviceName"  : which_request.service.name,
+                "createdAt"    : which_request.created_at,
+                "serviceImage" : which_request.service.image_url,
+            }
+
+            sent_quotation = [{
                 "masterId"       : match.master.id,
                 "masterName"     : match.master.user.name,
                 "masterImageUrl" : match.master.user.profile_image,
-                "reviewCount"    : Review.objects.filter(master= match.master).count(),
-                "avgRating"      : float(round(master_rating_avg['avg'],1)) if master_rating_avg['avg'] else 0,
-                "price"          : match.quotation_set.first().price if match.quotation_set.first() else 0,
-                "pricingMethod"  : match.quotation_set.first().pricing_method.name if match.quotation_set.first() else 0,
-                "total_hired"    : match.quotation_set.filter(is_employed=True).count(),
-            }
-            sent_quotation.append(proposal)
+                "reviewCount"    : match.review_count,
+                "avgRating"      : float(round(match.rating_avg,1)) if match.rating_avg else 0,
+                "price"          : match.price if match.price is not None else 0,
+                "pricingMethod"  : match.pricing_method if match.pricing_method else 0,
+                "total_hired"    : match.hire_count,
+            } for match in matched_all]
+
+            return JsonResponse({'REQUEST_DETAIL':request_detail,"RECEIVED_QUOTATION":sent_quotation},status= 200)
+
+        except KeyError:
+            return JsonResponse({"MESSAGE": "KEY_ERROR_OCCURED"},status=400)
+
+        except ValueError:
+            return JsonResponse({'MESSAGE': 'VALUE_ERROR_OCCURED'},status=400)
 
-        return JsonResponse({'REQUEST_DETAIL':request_detail,"RECEIVED_QUOTATION":sent_quotation},status= 200)
+        except Request.DoesNotExist:
+            return JsonResponse({"MESSAGE":"REQUEST_DOES_NOT_EXISTS"},status=404)
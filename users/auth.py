@@ -0,0 +1,284 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime    import datetime, timezone
+
+import jwt
+from django.conf      import settings
+from django.db        import IntegrityError, transaction
+from django.db.models import F
+
+import my_settings
+from users.models import User, RevokedToken
+
+class Principal:
+    __slots__ = ('user_id', 'is_master', 'master_id', 'version')
+
+    def __init__(self, user_id, is_master, master_id, version):
+        self.user_id   = user_id
+        self.is_master = is_master
+        self.master_id = master_id
+        self.version   = version
+
+class PrincipalCache:
+    """
+    Per-process LRU of user principals, each entry valid for ttl seconds.
+    Token revocation (a bumped token_version) reaches other processes once their entry expires.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self.entries = OrderedDict()
+        self.lock    = threading.Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+
+            principal, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[user_id]
+                return None
+
+            self.entries.move_to_end(user_id)
+            return principal
+
+    def put(self, principal):
+        with self.lock:
+            self.entries[principal.user_id] = (principal, time.monotonic()+self.ttl)
+            self.entries.move_to_end(principal.user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+principals = PrincipalCache(
+    getattr(settings, 'AUTH_PRINCIPAL_CACHE_SIZE', 10000),
+    getattr(settings, 'AUTH_PRINCIPAL_TTL', 30),
+)
+
+class TokenCache:
+    """
+    Per-process LRU of verified token claims keyed by the token's sha256 digest.
+    An entry lives for ttl seconds or until the token's exp claim, whichever comes first.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl     = ttl
+        self.entries = OrderedDict()
+        self.lock    = threading.Lock()
+        self.hits    = 0
+        self.misses  = 0
+
+    def get(self, digest):
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is None or entry[1] < time.monotonic():
+                self.entries.pop(digest, None)
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(digest)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, digest, claims):
+        lifetime = self.ttl
+        if isinstance(claims.get('exp'), (int, float)):
+            lifetime = min(lifetime, claims['exp']-time.time())
+        if lifetime <= 0:
+            return
+
+        with self.lock:
+            self.entries[digest] = (claims, time.monotonic()+lifetime)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries)}
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits   = 0
+            self.misses = 0
+
+tokens = TokenCache(
+    getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 10000),
+    getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300),
+)
+
+def decode_token(token):
+    if isinstance(token, str):
+        token = token.encode()
+
+    digest = hashlib.sha256(token).digest()
+    claims = tokens.get(digest)
+    if claims is None:
+        claims = jwt.decode(token, my_settings.SECRET_KEY, algorithms=my_settings.ALGORITHM)
+        tokens.put(digest, claims)
+    return claims
+
+class RevocationSet:
+    """
+    Revoked token ids mapped to their expiry, merged from RevokedToken at most every interval seconds.
+    Revocations made on this node apply at once; revocations from other nodes apply within one interval.
+    """
+    def __init__(self, interval):
+        self.interval  = interval
+        self.entries   = {}
+        self.synced_at = None
+        self.lock      = threading.Lock()
+
+    def sync(self):
+        now  = time.time()
+        rows = RevokedToken.objects.filter(expires_at__gt=datetime.fromtimestamp(now, timezone.utc))\
+                                   .values_list('jti', 'expires_at')
+
+        with self.lock:
+            self.entries = {jti: expires for jti, expires in self.entries.items() if expires > now}
+            self.entries.update((jti, expires_at.timestamp()) for jti, expires_at in rows)
+            self.synced_at = time.monotonic()
+
+    def add(self, jti, expires):
+        with self.lock:
+            self.entries[jti] = expires
+
+    def __contains__(self, jti):
+        if self.synced_at is None or time.monotonic()-self.synced_at > self.interval:
+            self.sync()
+        return self.entries.get(jti, 0) > time.time()
+
+    def clear(self):
+        with self.lock:
+            self.entries   = {}
+            self.synced_at = None
+
+revoked = RevocationSet(getattr(settings, 'AUTH_REVOCATION_SYNC_INTERVAL', 30))
+
+class InvalidToken(Exception):
+    def __init__(self, message, status=401):
+        super().__init__(message)
+        self.message = message
+        self.status  = status
+
+def load_principal(user_id):
+    if not isinstance(user_id, int):
+        return None
+
+    principal = principals.get(user_id)
+    if principal is not None:
+        return principal
+
+    rows = User.objects.filter(id=user_id).values_list('is_master', 'token_version', 'master__id').order_by('master__id')
+    if not rows:
+        return None
+
+    is_master, version, master_id = rows[0]
+    principal                     = Principal(user_id, is_master, master_id, version)
+    principals.put(principal)
+    return principal
+
+def authorize(token, kind='access'):
+    try:
+        claims = decode_token(token)
+    except jwt.exceptions.ExpiredSignatureError:
+        raise InvalidToken('TOKEN_EXPIRED')
+    except jwt.exceptions.DecodeError:
+        raise InvalidToken('JWT_DECODE_ERROR', 400)
+    except jwt.exceptions.InvalidTokenError:
+        raise InvalidToken('INVALID_TOKEN')
+
+    if claims.get('typ', 'access') != kind:
+        raise InvalidToken('INVALID_TOKEN')
+
+    if 'exp' not in claims and (kind != 'access' or not getattr(settings, 'AUTH_ACCEPT_LEGACY_TOKENS', False)):
+        raise InvalidToken('INVALID_TOKEN')
+
+    if 'jti' in claims and claims['jti'] in revoked:
+        if kind == 'refresh':
+            revoke_tokens(claims['user_id'])
+        raise InvalidToken('TOKEN_REVOKED')
+
+    principal = load_principal(claims.get('user_id'))
+
+    if not principal:
+        raise InvalidToken('INVALID_USER', 400)
+
+    if claims.get('ver', 0) != principal.version:
+        raise InvalidToken('TOKEN_REVOKED')
+
+    return principal, claims
+
+def encode_token(claims, lifetime):
+    claims['jti'] = uuid.uuid4().hex
+    claims['exp'] = int(time.time())+lifetime
+    return jwt.encode(claims, my_settings.SECRET_KEY, algorithm=my_settings.ALGORITHM)
+
+def issue_tokens(user_id):
+    principal = load_principal(user_id)
+    access    = encode_token({
+        'user_id'   : user_id,
+        'is_master' : principal.is_master,
+        'master_id' : principal.master_id,
+        'ver'       : principal.version,
+    }, getattr(settings, 'AUTH_ACCESS_TOKEN_LIFETIME', 900))
+    refresh   = encode_token({
+        'user_id' : user_id,
+        'ver'     : principal.version,
+        'typ'     : 'refresh',
+    }, getattr(settings, 'AUTH_REFRESH_TOKEN_LIFETIME', 1209600))
+    return access, refresh
+
+def issue_stream_ticket(user_id):
+    principal = load_principal(user_id)
+    return encode_token({
+        'user_id' : user_id,
+        'ver'     : principal.version,
+        'typ'     : 'stream',
+    }, getattr(settings, 'EVENT_TICKET_LIFETIME', 30))
+
+def prune_revoked():
+    RevokedToken.objects.filter(expires_at__lte=datetime.now(timezone.utc)).delete()
+
+def revoke_token(claims):
+    if 'jti' not in claims or 'exp' not in claims:
+        return revoke_tokens(claims['user_id'])
+
+    prune_revoked()
+    RevokedToken.objects.get_or_create(
+        jti      = claims['jti'],
+        defaults = {'expires_at': datetime.fromtimestamp(claims['exp'], timezone.utc)},
+    )
+    revoked.add(claims['jti'], claims['exp'])
+
+def consume_token(claims):
+    """
+    Revokes a single-use token and reports whether this call was the first to use it.
+    The unique jti makes the check atomic across processes, unlike the periodically synced RevocationSet.
+    """
+    prune_revoked()
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=claims['jti'], expires_at=datetime.fromtimestamp(claims['exp'], timezone.utc))
+    except IntegrityError:
+        return False
+    finally:
+        revoked.add(claims['jti'], claims['exp'])
+    return True
+
+def revoke_tokens(user_id):
+    User.objects.filter(id=user_id).update(token_version=F('token_version')+1)
+    principals.invalidate(user_id)
@@ -0,0 +1,39 @@
+from collections import Counter
+
+from django.db.models import F
+
+from users.models import Badge, Master
+
+def increment(field, user_ids):
+    counts = Counter(user_ids)
+    if not counts:
+        return
+
+    Badge.objects.bulk_create([Badge(user_id=user_id) for user_id in counts], ignore_conflicts=True)
+
+    by_amount = {}
+    for user_id, amount in counts.items():
+        by_amount.setdefault(amount, []).append(user_id)
+
+    for amount, ids in by_amount.items():
+        Badge.objects.filter(user_id__in=ids).update(**{field: F(field)+amount})
+
+def add_new_requests(master_ids):
+    if not master_ids:
+        return
+
+    users = dict(Master.objects.filter(id__in=set(master_ids)).values_list('id', 'user_id'))
+    increment('new_requests', [users[master_id] for master_id in master_ids if master_id in users])
+
+def add_new_quotations(user_ids):
+    increment('new_quotations', user_ids)
+
+def add_new_quotation(user_id):
+    add_new_quotations([user_id])
+
+def clear(field, user_id):
+    Badge.objects.filter(user_id=user_id).exclude(**{field: 0}).update(**{field: 0})
+
+def read_badges(user_id):
+    badge = Badge.objects.filter(user_id=user_id).values('new_requests', 'new_quotations').first()
+    return badge or {'new_requests': 0, 'new_quotations': 0}
@@ -0,0 +1,86 @@
+from collections import Counter
+
+from django.conf                import settings
+from django.db.models           import F, Q, Case, When, Value, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils               import timezone
+
+from users.models    import MasterCapacity
+from services.models import RequestMasterMatch
+
+def capacity_limits():
+    return (
+        getattr(settings, 'MASTER_DAILY_MATCH_CAP', None),
+        getattr(settings, 'MASTER_OPEN_MATCH_CAP', None),
+    )
+
+def saturated_masters():
+    daily_cap, open_cap = capacity_limits()
+    condition           = Q()
+
+    if daily_cap is not None:
+        condition |= Q(day=timezone.localdate(), daily_matches__gte=daily_cap)
+    if open_cap is not None:
+        condition |= Q(open_matches__gte=open_cap)
+
+    if not condition:
+        return set()
+
+    return set(MasterCapacity.objects.filter(condition).values_list('master_id', flat=True))
+
+def remaining_capacity(master_id):
+    daily_cap, open_cap = capacity_limits()
+    capacity            = MasterCapacity.objects.filter(master_id=master_id).first()
+    daily_matches       = capacity.daily_matches if capacity and capacity.day == timezone.localdate() else 0
+    open_matches        = capacity.open_matches if capacity else 0
+    remaining           = [
+        cap - used for cap, used in ((daily_cap, daily_matches), (open_cap, open_matches)) if cap is not None
+    ]
+
+    return max(0, min(remaining)) if remaining else None
+
+def record_matches(master_ids):
+    if not master_ids:
+        return
+
+    today  = timezone.localdate()
+    counts = Counter(master_ids)
+
+    MasterCapacity.objects.bulk_create([
+        MasterCapacity(master_id=master_id, day=today) for master_id in counts
+    ], ignore_conflicts=True)
+    MasterCapacity.objects.filter(master_id__in=counts).exclude(day=today).update(day=today, daily_matches=0)
+
+    by_amount = {}
+    for master_id, amount in counts.items():
+        by_amount.setdefault(amount, []).append(master_id)
+
+    for amount, ids in by_amount.items():
+        MasterCapacity.objects.filter(master_id__in=ids).update(
+            daily_matches = F('daily_matches')+amount,
+            open_matches  = F('open_matches')+amount,
+        )
+
+def release_matches(master_ids):
+    by_amount = {}
+    for master_id, amount in Counter(master_ids).items():
+        by_amount.setdefault(amount, []).append(master_id)
+
+    for amount, ids in by_amount.items():
+        MasterCapacity.objects.filter(master_id__in=ids, open_matches__gt=0).update(open_matches=Case(
+            When(open_matches__gte=amount, then=F('open_matches')-amount),
+            default=Value(0),
+        ))
+
+def release_match(master_id, amount=1):
+    release_matches([master_id] * amount)
+
+def rebuild_open_matches():
+    open_matches = RequestMasterMatch.objects.filter(
+        master_id               = OuterRef('master_id'),
+        request__closed_at      = None,
+        request__expired_at__gt = timezone.now(),
+        quotation               = None,
+    ).values('master_id').annotate(count=Count('id')).values('count')
+
+    return MasterCapacity.objects.update(open_matches=Coalesce(Subquery(open_matches), 0))
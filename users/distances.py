@@ -0,0 +1,99 @@
+import csv
+import math
+import threading
+from array import array
+
+from django.conf import settings
+
+from users.models import SubRegion
+
+class DistanceTable:
+    """
+    Dense subregion x subregion matrix of distance-decay points.
+    Subregion ids are mapped to matrix positions so every lookup is a single array access.
+    """
+    def __init__(self, subregion_ids, weight, scale_km):
+        self.positions = {subregion_id: position for position, subregion_id in enumerate(subregion_ids)}
+        self.size      = len(self.positions)
+        self.weight    = weight
+        self.scale_km  = scale_km
+        self.decay     = array('B', bytes(self.size * self.size))
+
+        for subregion_id in self.positions:
+            self.set_distance(subregion_id, subregion_id, 0)
+
+    def set_distance(self, origin, target, distance_km):
+        points = round(self.weight * math.exp(-distance_km / self.scale_km))
+        a      = self.positions[origin]
+        b      = self.positions[target]
+
+        self.decay[a * self.size + b] = points
+        self.decay[b * self.size + a] = points
+
+    def points(self, origin, target):
+        a = self.positions.get(origin)
+        b = self.positions.get(target)
+
+        if a is None or b is None:
+            return 0
+
+        return self.decay[a * self.size + b]
+
+    def nearby(self, origin):
+        a = self.positions.get(origin)
+
+        if a is None:
+            return {}
+
+        row = self.decay[a * self.size:(a+1) * self.size]
+        return {
+            subregion_id: row[position]
+            for subregion_id, position in self.positions.items() if row[position]
+        }
+
+    @classmethod
+    def load(cls, path, weight, scale_km):
+        try:
+            with open(path) as in_file:
+                data_reader = csv.reader(in_file)
+                next(data_reader, None)
+                rows = list(data_reader)
+        except FileNotFoundError:
+            return cls([], weight, scale_km)
+
+        subregions = {
+            (region_name, name): subregion_id
+            for subregion_id, region_name, name in SubRegion.objects.values_list('id', 'region__name', 'name')
+        }
+        table = cls(subregions.values(), weight, scale_km)
+
+        for row in rows:
+            origin = subregions.get((row[0], row[1]))
+            target = subregions.get((row[2], row[3]))
+            if origin and target:
+                table.set_distance(origin, target, float(row[4]))
+
+        return table
+
+_table      = None
+_table_lock = threading.Lock()
+
+def get_distance_table():
+    global _table
+
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _table = DistanceTable.load(
+                    getattr(settings, 'SUBREGION_DISTANCE_CSV', 'subregion_distances.csv'),
+                    getattr(settings, 'SUBREGION_DISTANCE_WEIGHT', 2),
+                    getattr(settings, 'SUBREGION_DISTANCE_SCALE_KM', 10),
+                )
+
+    return _table
+
+def reset_distance_table():
+    global _table
+
+    with _table_lock:
+        _table = None
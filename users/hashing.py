@@ -0,0 +1,52 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+from django.conf import settings
+
+_executor      = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers        = getattr(settings, 'PASSWORD_HASH_WORKERS', 4),
+                    thread_name_prefix = 'bcrypt',
+                )
+
+    return _executor
+
+def get_rounds():
+    return getattr(settings, 'PASSWORD_HASH_ROUNDS', 12)
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode()
+
+def _check(password, hashed):
+    try:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    except ValueError:
+        return False
+
+def hash_password(password):
+    return get_executor().submit(_hash, password, get_rounds()).result()
+
+def check_password(password, hashed):
+    return get_executor().submit(_check, password, hashed).result()
+
+async def hash_password_async(password):
+    return await asyncio.wrap_future(get_executor().submit(_hash, password, get_rounds()))
+
+async def check_password_async(password, hashed):
+    return await asyncio.wrap_future(get_executor().submit(_check, password, hashed))
+
+def needs_rehash(hashed):
+    try:
+        return int(hashed.split('$')[2]) != get_rounds()
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from users.capacity import rebuild_open_matches
+
+class Command(BaseCommand):
+
+        help = 'This Command Recounts Open Matches Of Every Master From Unanswered Live Requests'
+
+        def handle(self, *args, **options):
+            rebuilt = rebuild_open_matches()
+
+            self.stdout.write(self.style.SUCCESS(f'{rebuilt} master capacities rebuilt!'))
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db                   import connection
+
+from users.models import Master
+from users.stats  import rebuild
+
+def rebuild_chunk(master_ids):
+    try:
+        return rebuild(master_ids)
+    finally:
+        connection.close()
+
+class Command(BaseCommand):
+
+        help = 'This Command Recomputes Master Review And Hire Statistics'
+
+        def add_arguments(self, parser):
+            parser.add_argument(
+                "-chunk", default=1000, type=int, help = "How many masters per chunk?"
+            )
+            parser.add_argument(
+                "-workers", default=4, type=int, help = "How many chunks do you want to rebuild in parallel?"
+            )
+
+        def handle(self, *args, **options):
+            chunk      = options['chunk']
+            master_ids = list(Master.objects.order_by('id').values_list('id', flat=True))
+            chunks     = [master_ids[i:i+chunk] for i in range(0, len(master_ids), chunk)]
+
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                rebuilt = sum(executor.map(rebuild_chunk, chunks))
+
+            self.stdout.write(self.style.SUCCESS(f'{rebuilt} master stats rebuilt!'))
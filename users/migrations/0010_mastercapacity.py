@@ -0,0 +1,26 @@
+# Generated by Django 3.1.5 on 2026-10-18 08:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_auto_20210202_0319'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MasterCapacity',
+            fields=[
+                ('master', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='users.master')),
+                ('day', models.DateField()),
+                ('daily_matches', models.PositiveIntegerField(default=0)),
+                ('open_matches', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'master_capacities',
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.1.5 on 2026-10-18 08:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_mastercapacity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Badge',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to='users.user')),
+                ('new_requests', models.PositiveIntegerField(default=0)),
+                ('new_quotations', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'badges',
+            },
+        ),
+    ]
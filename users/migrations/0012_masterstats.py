@@ -0,0 +1,59 @@
+# Generated by Django 3.1.5 on 2026-10-18 09:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Sum
+
+
+def compute_master_stats(apps, schema_editor):
+    Master      = apps.get_model('users', 'Master')
+    Review      = apps.get_model('users', 'Review')
+    Quotation   = apps.get_model('services', 'Quotation')
+    MasterStats = apps.get_model('users', 'MasterStats')
+
+    reviews = {
+        row['master_id']: row
+        for row in Review.objects.values('master_id').annotate(count=Count('id'), total=Sum('rating'))
+    }
+    hires   = dict(
+        Quotation.objects.filter(is_employed=True)
+                         .values('match__master_id')
+                         .annotate(count=Count('id'))
+                         .values_list('match__master_id', 'count')
+    )
+    stats   = []
+    for master_id in Master.objects.values_list('id', flat=True):
+        review = reviews.get(master_id, {'count': 0, 'total': 0})
+        stats.append(MasterStats(
+            master_id    = master_id,
+            review_count = review['count'],
+            rating_sum   = review['total'],
+            rating_avg   = round(review['total'] / review['count'], 2) if review['count'] else 0,
+            hire_count   = hires.get(master_id, 0),
+        ))
+    MasterStats.objects.bulk_create(stats, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_badge'),
+        ('services', '0016_quotationimage_thumbnail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MasterStats',
+            fields=[
+                ('master', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='users.master')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.DecimalField(decimal_places=1, default=0, max_digits=10)),
+                ('rating_avg', models.DecimalField(decimal_places=2, default=0, max_digits=3)),
+                ('hire_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'master_stats',
+            },
+        ),
+        migrations.RunPython(compute_master_stats, migrations.RunPython.noop),
+    ]
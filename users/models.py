@@ -8,6 +8,7 @@ class User(models.Model):
     is_master     = models.BooleanField(default=False)
     gender        = models.ForeignKey('Gender', null=True, on_delete=models.SET_NULL)
     profile_image = models.URLField(max_length=2000, null=True)
+    token_version = models.PositiveIntegerField(default=0)
     created_at    = models.DateTimeField(auto_now_add=True)
     updated_at    = models.DateTimeField(auto_now=True)
 
@@ -87,4 +88,38 @@ class Gender(models.Model):
     name = models.CharField(max_length=45)
 
     class Meta:
-        db_table = "genders"
\ No newline at end of file
+        db_table = "genders"
+
+class MasterCapacity(models.Model):
+    master        = models.OneToOneField('Master', primary_key=True, on_delete=models.CASCADE)
+    day           = models.DateField()
+    daily_matches = models.PositiveIntegerField(default=0)
+    open_matches  = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "master_capacities"
+
+class Badge(models.Model):
+    user           = models.OneToOneField('User', primary_key=True, on_delete=models.CASCADE)
+    new_requests   = models.PositiveIntegerField(default=0)
+    new_quotations = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "badges"
+
+class RevokedToken(models.Model):
+    jti        = models.CharField(max_length=32, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "revoked_tokens"
+
+class MasterStats(models.Model):
+    master       = models.OneToOneField('Master', primary_key=True, related_name='stats', on_delete=models.CASCADE)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum   = models.DecimalField(max_digits=10, decimal_places=1, default=0)
+    rating_avg   = models.DecimalField(max_digits=3, decimal_places=2, default=0)
+    hire_count   = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "master_stats"
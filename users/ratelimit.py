@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+
+from django.conf                 import settings
+from django.http                 import JsonResponse
+from django.utils.module_loading import import_string
+
+from services.caching import cache_get, cache_set
+
+class LocalBucketBackend:
+    """
+    Token buckets for one process, stored as key -> (tokens, last refill time, time the bucket is full again).
+    Once max_keys is exceeded, full buckets are swept out and the next sweep waits until the table doubles.
+    """
+    def __init__(self, max_keys=100000):
+        self.max_keys   = max_keys
+        self.sweep_size = max_keys
+        self.buckets    = {}
+        self.lock       = threading.Lock()
+
+    def take(self, key, capacity, period):
+        now  = time.monotonic()
+        rate = capacity / period
+
+        with self.lock:
+            tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+            tokens             = min(capacity, tokens+(now-updated)*rate)
+            allowed            = tokens >= 1
+
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now, now+(capacity-tokens)/rate)
+
+            if len(self.buckets) > self.sweep_size:
+                self.prune(now)
+
+        return allowed
+
+    def prune(self, now):
+        self.buckets    = {key: bucket for key, bucket in self.buckets.items() if bucket[2] > now}
+        self.sweep_size = max(self.max_keys, 2*len(self.buckets))
+
+class CacheBucketBackend:
+    """
+    Token buckets kept in the Django cache so every node shares them.
+    The read-modify-write is not atomic, so bursts racing across nodes may let a few extra calls through.
+    If the cache is unreachable the call is let through rather than failing the request.
+    """
+    def take(self, key, capacity, period):
+        now             = time.time()
+        cache_key       = f'ratelimit:{key}'
+        tokens, updated = cache_get(cache_key, (capacity, now))
+        tokens          = min(capacity, tokens+(now-updated)*capacity/period)
+        allowed         = tokens >= 1
+
+        cache_set(cache_key, (tokens-1 if allowed else tokens, now), period)
+        return allowed
+
+_backend      = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = import_string(getattr(settings, 'RATE_LIMIT_BACKEND', 'users.ratelimit.LocalBucketBackend'))()
+
+    return _backend
+
+def client_ip(request):
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded and getattr(settings, 'RATE_LIMIT_TRUST_FORWARDED', False):
+        return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+def request_email(request):
+    try:
+        email = json.loads(request.body).get('email')
+    except (ValueError, AttributeError):
+        return None
+    return email.strip().lower() if isinstance(email, str) else None
+
+def rate_limit(scope):
+
+    def decorator(function):
+
+        def wrapper(view, request, *args, **kwargs):
+            limits  = getattr(settings, 'RATE_LIMITS', {}).get(scope, {})
+            backend = get_backend()
+            keys    = {'ip': client_ip(request)}
+
+            if 'email' in limits:
+                keys['email'] = request_email(request)
+
+            for kind, (capacity, period) in limits.items():
+                if keys.get(kind) and not backend.take(f'{scope}:{kind}:{keys[kind]}', capacity, period):
+                    return JsonResponse({'MESSAGE': 'TOO_MANY_REQUESTS'}, status=429)
+
+            return function(view, request, *args, **kwargs)
+        return wrapper
+    return decorator
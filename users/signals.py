@@ -0,0 +1,39 @@
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
+from django.dispatch          import receiver
+
+from users.models import User, Master, Review
+from users.stats  import ensure_stats, add_review, remove_review
+from users.auth   import principals, tokens, revoked
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_principal(sender, instance, **kwargs):
+    principals.invalidate(instance.id)
+
+@receiver(post_migrate)
+def forget_principals(sender, **kwargs):
+    principals.clear()
+    tokens.clear()
+    revoked.clear()
+
+@receiver(post_save, sender=Master)
+def create_master_stats(sender, instance, created, **kwargs):
+    principals.invalidate(instance.user_id)
+    if created:
+        ensure_stats([instance.id])
+
+@receiver(pre_save, sender=Review)
+def remember_review(sender, instance, **kwargs):
+    instance._previous = Review.objects.filter(pk=instance.pk).values_list('master_id', 'rating').first()\
+                         if instance.pk else None
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    if previous:
+        remove_review(*previous)
+    add_review(instance.master_id, instance.rating)
+
+@receiver(post_delete, sender=Review)
+def discount_review(sender, instance, **kwargs):
+    remove_review(instance.master_id, instance.rating)
@@ -0,0 +1,65 @@
+from django.db.models           import Case, When, Value, F, Count, Sum, DecimalField, FloatField
+from django.db.models.functions import Cast
+
+from users.models    import MasterStats, Review
+from services.models import Quotation
+
+def ensure_stats(master_ids):
+    MasterStats.objects.bulk_create([MasterStats(master_id=master_id) for master_id in master_ids], ignore_conflicts=True)
+
+def refresh_average(master_ids):
+    MasterStats.objects.filter(master_id__in=master_ids).update(rating_avg=Case(
+        When(review_count=0, then=Value(0)),
+        default      = Cast('rating_sum', FloatField()) / F('review_count'),
+        output_field = DecimalField(max_digits=3, decimal_places=2),
+    ))
+
+def add_review(master_id, rating):
+    ensure_stats([master_id])
+    MasterStats.objects.filter(master_id=master_id).update(
+        review_count = F('review_count')+1,
+        rating_sum   = F('rating_sum')+rating,
+    )
+    refresh_average([master_id])
+
+def remove_review(master_id, rating):
+    MasterStats.objects.filter(master_id=master_id, review_count__gt=0).update(
+        review_count = F('review_count')-1,
+        rating_sum   = F('rating_sum')-rating,
+    )
+    refresh_average([master_id])
+
+def record_hire(master_id, amount=1):
+    ensure_stats([master_id])
+    MasterStats.objects.filter(master_id=master_id).update(hire_count=F('hire_count')+amount)
+
+def rebuild(master_ids):
+    master_ids = list(master_ids)
+    reviews    = {
+        master_id: (count, total)
+        for master_id, count, total in Review.objects.filter(master_id__in=master_ids)
+                                                     .values('master_id')
+                                                     .annotate(count=Count('id'), total=Sum('rating'))
+                                                     .values_list('master_id', 'count', 'total')
+    }
+    hires      = dict(
+        Quotation.objects.filter(match__master_id__in=master_ids, is_employed=True)
+                         .values('match__master_id')
+                         .annotate(count=Count('id'))
+                         .values_list('match__master_id', 'count')
+    )
+
+    stats = []
+    for master_id in master_ids:
+        count, total = reviews.get(master_id, (0, 0))
+        stats.append(MasterStats(
+            master_id    = master_id,
+            review_count = count,
+            rating_sum   = total,
+            rating_avg   = round(total / count, 2) if count else 0,
+            hire_count   = hires.get(master_id, 0),
+        ))
+
+    ensure_stats(master_ids)
+    MasterStats.objects.bulk_update(stats, ['review_count', 'rating_sum', 'rating_avg', 'hire_count'])
+    return len(stats)
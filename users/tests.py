@@ -1,17 +1,28 @@
 import unittest, json, jwt
+import asyncio, time
 import bcrypt
-from datetime        import datetime
-from secrets         import token_urlsafe
-from unittest.mock   import MagicMock, patch
-
-from django.test     import TestCase,Client, TransactionTestCase
-
-from users.models    import User, Gender, Region, SubRegion, Master, MasterService, Review
-from services.models import Service, Category
-from my_settings     import SECRET_KEY, ALGORITHM
+from datetime               import datetime, timedelta
+from secrets                import token_urlsafe
+from io                     import StringIO
+from unittest.mock          import MagicMock, patch
+
+from django.test            import TestCase,Client, TransactionTestCase, override_settings
+from django.db              import connection
+from django.core.management import call_command
+from django.utils           import timezone
+
+from users.models           import User, Gender, Region, SubRegion, Master, MasterService, Review, Badge, MasterStats, RevokedToken
+from services.models        import Service, Category
+from users.auth             import TokenCache, decode_token, revoke_tokens, revoked, tokens
+from users.hashing          import hash_password_async, check_password, check_password_async, needs_rehash
+from users.ratelimit        import LocalBucketBackend
+from my_settings            import SECRET_KEY, ALGORITHM
 
 client = Client()
 
+def access_token(user_id):
+    return jwt.encode({'user_id':user_id, 'exp':int(time.time())+900}, SECRET_KEY, algorithm=ALGORITHM)
+
 class UserSignUpSignInTest(TestCase):
     @classmethod
     def setUpTestData(cls):
@@ -112,7 +123,8 @@ class UserSignUpSignInTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(),{
             'MESSAGE':'SUCCESS',
-            'TOKEN':response.json()['TOKEN']
+            'TOKEN':response.json()['TOKEN'],
+            'REFRESH_TOKEN':response.json()['REFRESH_TOKEN']
         })
 
     def test_user_post_signin_invalid_email(self):
@@ -224,7 +236,7 @@ class MasterSignUpTest(TestCase):
             "birthdate":"19991023",
             "services":['Python']
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 201)
         self.assertEqual(response.json(),{
@@ -246,7 +258,7 @@ class MasterSignUpTest(TestCase):
             'birthdate':'1812110',
             'services':['Python']
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         
         self.assertEqual(response.status_code, 400)
@@ -269,7 +281,7 @@ class MasterSignUpTest(TestCase):
             'birthdate':'18121110',
             'services':['Python']
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         
         self.assertEqual(response.status_code, 400)
@@ -292,7 +304,7 @@ class MasterSignUpTest(TestCase):
             'birthdate':'1812110',
             'services':['Python']
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         
         self.assertEqual(response.status_code, 400)
@@ -315,7 +327,7 @@ class MasterSignUpTest(TestCase):
             'birthdate':'18121110',
             'services':123
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         
         self.assertEqual(response.status_code, 400)
@@ -337,7 +349,7 @@ class MasterSignUpTest(TestCase):
             'birthdate':'18121110',
             'services':123
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         
         self.assertEqual(response.status_code, 400)
@@ -360,7 +372,7 @@ class MasterSignUpTest(TestCase):
             'birthdate':'18121110',
             'services':['Python']
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         
         self.assertEqual(response.status_code, 400)
@@ -383,7 +395,7 @@ class MasterSignUpTest(TestCase):
             'birthdate':'18121110',
             'services':['Python']
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         
         self.assertEqual(response.status_code, 400)
@@ -406,7 +418,7 @@ class MasterSignUpTest(TestCase):
             'birthdate':'18121110',
             'services':['Python']
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         
         self.assertEqual(response.status_code, 400)
@@ -429,7 +441,7 @@ class MasterSignUpTest(TestCase):
             'birthdate':'18121110',
             'services':['Python']
         }
-        user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(user.id)
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         response   = client.post('/users/master_signup', json.dumps(master), **{"HTTP_Authorization" : user_token}, content_type='application/json')
         
@@ -523,9 +535,27 @@ class KakaoSignInTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json(),{
             'MESSAGE':'SUCCESS',
-            'token':response.json()['token']
+            'token':response.json()['token'],
+            'TOKEN':response.json()['TOKEN'],
+            'REFRESH_TOKEN':response.json()['REFRESH_TOKEN']
         })
 
+    @patch('users.views.requests')
+    def test_kakao_signin_issues_tokens(self, mock_request):
+        for email in ['jang@kakao.com', 'new@kakao.com']:
+            mock_request.get.return_value.json.return_value = {'kakao_account': {
+                'email'   : email,
+                'gender'  : 'male',
+                'profile' : {'nickname':'hi'},
+            }}
+            response = client.get('/users/kakao_signin', HTTP_Authorization='fake')
+            user     = User.objects.get(email=email)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(decode_token(response.json()['TOKEN'])['user_id'], user.id)
+            refreshed = client.post('/users/token_refresh', json.dumps({'refreshToken':response.json()['REFRESH_TOKEN']}), content_type='application/json')
+            self.assertEqual(refreshed.status_code, 200)
+
 class ProfileTest(TestCase):
 
     @classmethod
@@ -576,7 +606,7 @@ class ProfileTest(TestCase):
 
     def test_get_profile_list_success(self):
         master = Master.objects.first()
-        user_token = jwt.encode({'user_id':master.user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(master.user.id)
 
         response   = client.get('/users/profile', **{'HTTP_Authorization' : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 200)
@@ -597,12 +627,43 @@ class ProfileTest(TestCase):
                 }
         })
 
+    def test_get_profile_list_query_count_does_not_grow(self):
+        def count_queries():
+            queries = []
+            with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                response = client.get('/users/profile', content_type='application/json')
+            return response, len(queries)
+
+        _, one_master = count_queries()
+        master        = Master.objects.first()
+        for index in range(3):
+            user = User.objects.create(name='고수', email=f'master{index}@mail.com', password='password', is_master=True)
+            Master.objects.create(user=user, birthdate=master.birthdate, subregions=master.subregions)
+        response, four_masters = count_queries()
+
+        self.assertEqual(response.json()['masterList']['count'], 4)
+        self.assertEqual(four_masters, one_master)
+
+    def test_get_profile_list_near_subregion_success(self):
+        subregion = SubRegion.objects.get(name='광진구')
+        response  = client.get('/users/profile', {'near':subregion.id}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['masterList']['count'], 1)
+        self.assertEqual(response.json()['masterList']['masters'][0]['name'], '장장장')
+
+    def test_get_profile_list_near_invalid_subregion(self):
+        response = client.get('/users/profile', {'near':'광진구'}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'MESSAGE':'INVALID_SUBREGION'})
+
     def test_patch_profile_main_service_success(self):
         main_service = {
             'main_service':'Python'
         }
         master = Master.objects.first()
-        user_token = jwt.encode({'user_id':master.user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(master.user.id)
 
         response   = client.patch('/users/profile_main_service', json.dumps(main_service), **{'HTTP_Authorization' : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 200)
@@ -615,7 +676,7 @@ class ProfileTest(TestCase):
             'main_service':'hi'
         }
         master = Master.objects.first()
-        user_token = jwt.encode({'user_id':master.user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(master.user.id)
 
         response   = client.patch('/users/profile_main_service', json.dumps(main_service), **{'HTTP_Authorization' : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 400)
@@ -628,7 +689,7 @@ class ProfileTest(TestCase):
             'introduction':'dmdkmdkmkdmkdmkdkmdmdkkddmkdmdkmdk'
         }
         master = Master.objects.first()
-        user_token = jwt.encode({'user_id':master.user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(master.user.id)
 
         response   = client.patch('/users/profile_introduction', json.dumps(introduction), **{'HTTP_Authorization' : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 200)
@@ -641,7 +702,7 @@ class ProfileTest(TestCase):
             'introduction':123
         }
         master = Master.objects.first()
-        user_token = jwt.encode({'user_id':master.user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(master.user.id)
 
         response   = client.patch('/users/profile_introduction', json.dumps(introduction), **{'HTTP_Authorization' : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 400)
@@ -653,7 +714,7 @@ class ProfileTest(TestCase):
         introduction = {
         }
         master = Master.objects.first()
-        user_token = jwt.encode({'user_id':master.user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(master.user.id)
 
         response   = client.patch('/users/profile_introduction', json.dumps(introduction), **{'HTTP_Authorization' : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 400)
@@ -666,7 +727,7 @@ class ProfileTest(TestCase):
             'description':'hello'
         }
         master = Master.objects.first()
-        user_token = jwt.encode({'user_id':master.user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(master.user.id)
 
         response   = client.patch('/users/profile_description', json.dumps(description), **{'HTTP_Authorization' : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 200)
@@ -678,7 +739,7 @@ class ProfileTest(TestCase):
         description = {
         }
         master = Master.objects.first()
-        user_token = jwt.encode({'user_id':master.user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(master.user.id)
 
         response   = client.patch('/users/profile_description', json.dumps(description), **{'HTTP_Authorization' : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 400)
@@ -688,7 +749,7 @@ class ProfileTest(TestCase):
 
     def test_get_profile_description_success(self):
         master     = Master.objects.first()
-        user_token = jwt.encode({'user_id':master.user.id}, SECRET_KEY, algorithm=ALGORITHM)
+        user_token = access_token(master.user.id)
 
         response   = client.get('/users/profile_description', **{'HTTP_Authorization' : user_token}, content_type='application/json')
         self.assertEqual(response.status_code, 200)
@@ -699,3 +760,330 @@ class ProfileTest(TestCase):
 
     
     
+
+
+class BadgeViewTest(TestCase):
+    def setUp(self):
+        self.user    = User.objects.create(name='장장장', email='badge@mail.com', password='password')
+        self.headers = {"HTTP_Authorization" : access_token(self.user.id)}
+
+    def test_get_badges_without_counter_success(self):
+        response = client.get('/users/badges', **self.headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'newRequests': 0, 'newQuotations': 0})
+
+    def test_get_badges_success(self):
+        Badge.objects.create(user=self.user, new_requests=2, new_quotations=3)
+
+        client.get('/users/badges', **self.headers)
+        with self.assertNumQueries(1):
+            response = client.get('/users/badges', **self.headers)
+
+        self.assertEqual(response.json(), {'newRequests': 2, 'newQuotations': 3})
+
+    def test_get_badges_cleared_by_quotation_list_success(self):
+        Badge.objects.create(user=self.user, new_requests=2, new_quotations=3)
+        client.get('/services/quotationList', **self.headers)
+
+        self.assertEqual(client.get('/users/badges', **self.headers).json(), {'newRequests': 2, 'newQuotations': 0})
+
+
+class MasterStatsTest(TransactionTestCase):
+    def setUp(self):
+        region       = Region.objects.create(name='서울특별시')
+        self.service = Service.objects.create(category=Category.objects.create(name='백엔드'), name='Python')
+        self.user    = User.objects.create(name='장장김', email='reviewer@mail.com', password='password')
+        self.master  = Master.objects.create(
+            user       = User.objects.create(name='장장장', email='master@mail.com', password='password', is_master=True),
+            birthdate  = datetime.strptime('19901103', '%Y%m%d').date(),
+            subregions = SubRegion.objects.create(name='광진구', region=region),
+        )
+
+    def review(self, rating):
+        return Review.objects.create(user=self.user, master=self.master, service=self.service, rating=rating, content='hi')
+
+    def stats(self):
+        return MasterStats.objects.filter(master=self.master).values_list('review_count', 'rating_sum', 'rating_avg', 'hire_count').get()
+
+    def test_master_stats_follow_review_writes(self):
+        self.assertEqual(self.stats(), (0, 0, 0, 0))
+
+        first = self.review(4.0)
+        self.review(5.0)
+        self.assertEqual(self.stats(), (2, 9, 4.5, 0))
+
+        first.rating = 3.0
+        first.save()
+        self.assertEqual(self.stats(), (2, 8, 4, 0))
+
+        first.delete()
+        self.assertEqual(self.stats(), (1, 5, 5, 0))
+
+    def test_rebuild_master_stats_command(self):
+        Review.objects.bulk_create([
+            Review(user=self.user, master=self.master, service=self.service, rating=rating) for rating in (4.0, 4.5, 5.0)
+        ])
+        call_command('rebuild_master_stats', chunk=1, workers=2, stdout=StringIO())
+
+        self.assertEqual(self.stats(), (3, 13.5, 4.5, 0))
+
+    def test_profile_detail_reads_master_stats(self):
+        self.review(4.0)
+        MasterStats.objects.filter(master=self.master).update(rating_avg=3.5)
+        response = client.get(f'/users/profile/{self.master.id}')
+
+        self.assertEqual(response.json()['profile'][0]['rating'], '3.5')
+
+class PrincipalAuthTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            name     = '장장장',
+            email    = 'auth@mail.com',
+            password = bcrypt.hashpw('1a2s3d4f'.encode('utf-8'), bcrypt.gensalt()).decode()
+        )
+
+    def sign_in(self):
+        response = client.post('/users/signin', json.dumps({'email':'auth@mail.com', 'password':'1a2s3d4f'}), content_type='application/json')
+        return response.json()['TOKEN']
+
+    def test_signin_token_claims(self):
+        claims = jwt.decode(self.sign_in(), SECRET_KEY, algorithms=ALGORITHM)
+
+        self.assertEqual(claims, {
+            'user_id'   : self.user.id,
+            'is_master' : False,
+            'master_id' : None,
+            'ver'       : 0,
+            'jti'       : claims['jti'],
+            'exp'       : claims['exp']
+        })
+        self.assertAlmostEqual(claims['exp'], time.time()+900, delta=5)
+
+    def test_cached_principal_needs_no_auth_query(self):
+        headers = {'HTTP_Authorization' : self.sign_in()}
+        client.get('/users/badges', **headers)
+
+        with self.assertNumQueries(1):
+            client.get('/users/badges', **headers)
+
+    def test_revoked_token(self):
+        headers     = {'HTTP_Authorization' : self.sign_in()}
+        unversioned = {'HTTP_Authorization' : access_token(self.user.id)}
+        revoke_tokens(self.user.id)
+
+        self.assertEqual(client.get('/users/badges', **headers).json(), {'MESSAGE':'TOKEN_REVOKED'})
+        self.assertEqual(client.get('/users/badges', **unversioned).status_code, 401)
+        self.assertEqual(client.get('/users/badges', HTTP_Authorization=self.sign_in()).status_code, 200)
+
+    def test_master_required_for_non_master(self):
+        response = client.get('/users/profile_introduction', HTTP_Authorization=self.sign_in())
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'MESSAGE':'MASTER_REQUIRED'})
+
+@override_settings(RATE_LIMITS={})
+class RefreshTokenTest(TestCase):
+    def setUp(self):
+        User.objects.create(
+            name     = '장장장',
+            email    = 'refresh@mail.com',
+            password = bcrypt.hashpw('1a2s3d4f'.encode('utf-8'), bcrypt.gensalt()).decode()
+        )
+        response = client.post('/users/signin', json.dumps({'email':'refresh@mail.com', 'password':'1a2s3d4f'}), content_type='application/json')
+        self.access  = response.json()['TOKEN']
+        self.refresh = response.json()['REFRESH_TOKEN']
+
+    def refresh_tokens(self, token):
+        return client.post('/users/token_refresh', json.dumps({'refreshToken':token}), content_type='application/json')
+
+    def test_refresh_rotates_tokens(self):
+        response = self.refresh_tokens(self.refresh)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get('/users/badges', HTTP_Authorization=response.json()['TOKEN']).status_code, 200)
+        self.assertEqual(self.refresh_tokens(response.json()['REFRESH_TOKEN']).status_code, 200)
+
+    def test_replayed_refresh_token_revokes_family(self):
+        rotated = self.refresh_tokens(self.refresh).json()
+
+        self.assertEqual(self.refresh_tokens(self.refresh).json(), {'MESSAGE':'TOKEN_REVOKED'})
+        self.assertEqual(self.refresh_tokens(rotated['REFRESH_TOKEN']).json(), {'MESSAGE':'TOKEN_REVOKED'})
+        self.assertEqual(client.get('/users/badges', HTTP_Authorization=rotated['TOKEN']).json(), {'MESSAGE':'TOKEN_REVOKED'})
+
+    def test_replay_on_another_process_is_detected(self):
+        rotated = self.refresh_tokens(self.refresh).json()
+        revoked.clear()
+
+        with patch('users.auth.RevocationSet.sync'):
+            response = self.refresh_tokens(self.refresh)
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'MESSAGE':'TOKEN_REVOKED'})
+        self.assertEqual(client.get('/users/badges', HTTP_Authorization=rotated['TOKEN']).json(), {'MESSAGE':'TOKEN_REVOKED'})
+
+    def test_tokens_are_not_interchangeable(self):
+        self.assertEqual(self.refresh_tokens(self.access).json(), {'MESSAGE':'INVALID_TOKEN'})
+        self.assertEqual(client.get('/users/badges', HTTP_Authorization=self.refresh).json(), {'MESSAGE':'INVALID_TOKEN'})
+
+    def test_expired_access_token(self):
+        with patch('users.auth.time.time', return_value=time.time()-901):
+            response = client.post('/users/signin', json.dumps({'email':'refresh@mail.com', 'password':'1a2s3d4f'}), content_type='application/json')
+
+        response = client.get('/users/badges', HTTP_Authorization=response.json()['TOKEN'])
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'MESSAGE':'TOKEN_EXPIRED'})
+
+    def test_signout_revokes_both_tokens(self):
+        response = client.post('/users/signout', json.dumps({'refreshToken':self.refresh}), content_type='application/json', HTTP_Authorization=self.access)
+
+        self.assertEqual(response.json(), {'MESSAGE':'SIGNED_OUT'})
+        self.assertEqual(client.get('/users/badges', HTTP_Authorization=self.access).json(), {'MESSAGE':'TOKEN_REVOKED'})
+        self.assertEqual(self.refresh_tokens(self.refresh).json(), {'MESSAGE':'TOKEN_REVOKED'})
+        self.assertTrue(RevokedToken.objects.exists())
+
+    def test_revocation_synced_from_table(self):
+        claims = jwt.decode(self.access, SECRET_KEY, algorithms=ALGORITHM)
+        client.get('/users/badges', HTTP_Authorization=self.access)
+        RevokedToken.objects.create(jti=claims['jti'], expires_at=timezone.now()+timedelta(minutes=15))
+
+        self.assertEqual(client.get('/users/badges', HTTP_Authorization=self.access).status_code, 200)
+        with patch('users.auth.time.monotonic', return_value=time.monotonic()+31):
+            self.assertEqual(client.get('/users/badges', HTTP_Authorization=self.access).json(), {'MESSAGE':'TOKEN_REVOKED'})
+
+    def test_legacy_token_rejected_by_default(self):
+        user_id = User.objects.get(email='refresh@mail.com').id
+        legacy  = jwt.encode({'user_id':user_id}, SECRET_KEY, algorithm=ALGORITHM)
+
+        self.assertEqual(client.get('/users/badges', HTTP_Authorization=legacy).json(), {'MESSAGE':'INVALID_TOKEN'})
+        with override_settings(AUTH_ACCEPT_LEGACY_TOKENS=True):
+            self.assertEqual(client.get('/users/badges', HTTP_Authorization=legacy).status_code, 200)
+
+class TokenCacheTest(TestCase):
+    def setUp(self):
+        tokens.clear()
+        self.user  = User.objects.create(name='장장장', email='token@mail.com', password='password')
+        self.token = access_token(self.user.id)
+
+    def test_repeated_token_skips_verification(self):
+        client.get('/users/badges', HTTP_Authorization=self.token)
+
+        with patch('users.auth.jwt.decode') as decode:
+            response = client.get('/users/badges', HTTP_Authorization=self.token)
+
+        self.assertEqual(response.status_code, 200)
+        decode.assert_not_called()
+        self.assertEqual(tokens.stats(), {'hits':1, 'misses':1, 'size':1})
+
+    def test_invalid_token_is_not_cached(self):
+        for _ in range(2):
+            response = client.get('/users/badges', HTTP_Authorization='invalid')
+            self.assertEqual(response.json(), {'MESSAGE':'JWT_DECODE_ERROR'})
+
+        self.assertEqual(tokens.stats(), {'hits':0, 'misses':2, 'size':0})
+
+    def test_entry_ends_at_exp_claim(self):
+        cache = TokenCache(10, 300)
+        now   = time.time()
+        cache.put(b'valid', {'exp':now+60})
+        cache.put(b'expired', {'exp':now-1})
+
+        with patch('users.auth.time.monotonic', return_value=time.monotonic()+61):
+            self.assertIsNone(cache.get(b'valid'))
+        self.assertIsNone(cache.get(b'expired'))
+
+    def test_least_recently_used_evicted(self):
+        cache = TokenCache(2, 300)
+        cache.put(b'a', {})
+        cache.put(b'b', {})
+        cache.get(b'a')
+        cache.put(b'c', {})
+
+        self.assertEqual(list(cache.entries), [b'a', b'c'])
+
+    def test_decode_token_accepts_str_and_bytes(self):
+        self.assertEqual(decode_token(self.token)['user_id'], self.user.id)
+        self.assertEqual(decode_token(self.token.encode())['user_id'], self.user.id)
+        self.assertEqual(tokens.stats()['hits'], 1)
+
+class PasswordHashingTest(TestCase):
+    @override_settings(PASSWORD_HASH_ROUNDS=5)
+    def test_signin_rehashes_to_current_rounds(self):
+        User.objects.create(
+            name     = '장장장',
+            email    = 'hash@mail.com',
+            password = bcrypt.hashpw('1a2s3d4f'.encode('utf-8'), bcrypt.gensalt(4)).decode()
+        )
+        response = client.post('/users/signin', json.dumps({'email':'hash@mail.com', 'password':'1a2s3d4f'}), content_type='application/json')
+        stored   = User.objects.get(email='hash@mail.com').password
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(stored.startswith('$2b$05$'))
+        self.assertTrue(check_password('1a2s3d4f', stored))
+        self.assertFalse(needs_rehash(stored))
+
+    @override_settings(PASSWORD_HASH_ROUNDS=4)
+    def test_async_hashing(self):
+        async def scenario():
+            hashed = await hash_password_async('1a2s3d4f')
+            return hashed, await check_password_async('1a2s3d4f', hashed), await check_password_async('wrong', hashed)
+
+        hashed, right, wrong = asyncio.run(scenario())
+
+        self.assertTrue(hashed.startswith('$2b$04$'))
+        self.assertEqual((right, wrong), (True, False))
+
+class RateLimitTest(TestCase):
+    def sign_in(self, email, ip):
+        return client.post('/users/signin', json.dumps({'email':email, 'password':'wrong1234'}), content_type='application/json', REMOTE_ADDR=ip)
+
+    @override_settings(RATE_LIMITS={'signin': {'ip': (2, 60), 'email': (2, 60)}})
+    def test_signin_limited_per_ip_and_email(self):
+        self.assertEqual(self.sign_in('first@mail.com', '10.0.0.1').status_code, 400)
+        self.assertEqual(self.sign_in('first@mail.com', '10.0.0.1').status_code, 400)
+
+        with self.assertNumQueries(0):
+            response = self.sign_in('first@mail.com', '10.0.0.2')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.json(), {'MESSAGE':'TOO_MANY_REQUESTS'})
+        self.assertEqual(self.sign_in('second@mail.com', '10.0.0.1').status_code, 429)
+        self.assertEqual(self.sign_in('second@mail.com', '10.0.0.3').status_code, 400)
+
+    def test_bucket_refills(self):
+        backend = LocalBucketBackend()
+
+        with patch('users.ratelimit.time.monotonic', side_effect=[0, 0, 0, 30]):
+            self.assertEqual([backend.take('key', 2, 60) for _ in range(4)], [True, True, False, True])
+
+    def test_bucket_prunes_full_buckets(self):
+        backend = LocalBucketBackend(max_keys=2)
+
+        with patch('users.ratelimit.time.monotonic', side_effect=[0, 0, 60]):
+            for key in ('a', 'b', 'c'):
+                backend.take(key, 1, 60)
+
+        self.assertEqual(list(backend.buckets), ['c'])
+
+    def test_bucket_prune_keeps_other_scopes(self):
+        backend = LocalBucketBackend(max_keys=2)
+
+        with patch('users.ratelimit.time.monotonic', side_effect=[0, 0, 60, 60]):
+            backend.take('password_reset:ip:1', 1, 3600)
+            backend.take('signin:ip:1', 1, 60)
+            backend.take('signin:ip:2', 1, 60)
+
+            self.assertFalse(backend.take('password_reset:ip:1', 1, 3600))
+
+        self.assertEqual(list(backend.buckets), ['password_reset:ip:1', 'signin:ip:2'])
+
+    def test_bucket_prune_is_amortized(self):
+        backend = LocalBucketBackend(max_keys=2)
+
+        with patch('users.ratelimit.time.monotonic', return_value=0), patch.object(backend, 'prune', wraps=backend.prune) as prune:
+            for key in range(8):
+                backend.take(key, 1, 60)
+
+        self.assertEqual(prune.call_count, 2)
+        self.assertEqual(len(backend.buckets), 8)
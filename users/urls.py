@@ -3,6 +3,8 @@ from django.urls import path
 from .views import (
     SignUpView,
     SignInView,
+    SignOutView,
+    TokenRefreshView,
     MasterSignUpView,
     CategoryServiceView,
     KaKaoView,
@@ -12,12 +14,15 @@ from .views import (
     ProfileDescriptionView,
     ProfileListView,
     ProfileDetailView,
-    TempMasterView
+    TempMasterView,
+    BadgeView
 )
 
 urlpatterns = [
     path('/signup',SignUpView.as_view()),
     path('/signin',SignInView.as_view()),
+    path('/signout',SignOutView.as_view()),
+    path('/token_refresh',TokenRefreshView.as_view()),
     path('/master_signup',MasterSignUpView.as_view()),
     path('/category',CategoryServiceView.as_view()),
     path('/password_reset',PasswordResetView.as_view()),
@@ -27,5 +32,6 @@ urlpatterns = [
     path('/profile_main_service',ProfileMainServiceView.as_view()),
     path('/profile_introduction',ProfileIntroductionView.as_view()),
     path('/profile_description',ProfileDescriptionView.as_view()),
-    path('/temp_master',TempMasterView.as_view())
+    path('/temp_master',TempMasterView.as_view()),
+    path('/badges',BadgeView.as_view())
 ]   
\ No newline at end of file
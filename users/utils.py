@@ -1,11 +1,12 @@
-import re, jwt
+import re
 import functools, time
 
-from django.http  import JsonResponse
-from django.db   import connection, reset_queries
+from django.http             import JsonResponse
+from django.db               import connection, reset_queries
+from django.utils.functional import SimpleLazyObject
 
 from users.models import User, Master
-import my_settings
+from users.auth   import InvalidToken, authorize
 
 def validate_email(email):
     pattern = re.compile(r'^[a-zA-Z0-9+-_.]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$')
@@ -25,57 +26,37 @@ def validate_birthdate(birthdate):
 def validate_master(user):
     return user.master_set.exists()
 
+def authenticate(request, function, view, args, kwargs, master=False):
+    access_token = request.headers.get("Authorization")
+
+    if not access_token:
+        return JsonResponse({'MESSAGE':'LOGIN_REQUIRED'}, status=401)
+
+    try:
+        principal, claims = authorize(access_token)
+    except InvalidToken as error:
+        return JsonResponse({'MESSAGE':error.message}, status=error.status)
+
+    if master and not (principal.is_master and principal.master_id):
+        return JsonResponse({'MESSAGE':'MASTER_REQUIRED'}, status=401)
+
+    request.user_id      = principal.user_id
+    request.master_id    = principal.master_id
+    request.token_claims = claims
+    request.user         = SimpleLazyObject(lambda: User.objects.get(id=principal.user_id))
+    request.master       = SimpleLazyObject(lambda: Master.objects.get(id=principal.master_id))
+    return function(view, request, *args, **kwargs)
+
 def login_required(function):
 
     def wrapper(view, request, *args, **kwargs):
-        try:
-            access_token = request.headers.get("Authorization")
-
-            if not access_token:
-                return JsonResponse({'MESSAGE':'LOGIN_REQUIRED'}, status=401)
-            
-            header = jwt.decode(
-                access_token,
-                my_settings.SECRET_KEY,
-                algorithms=my_settings.ALGORITHM
-            )
-
-            if not User.objects.filter(id=header['user_id']).exists():
-                return JsonResponse({'MESSAGE':'INVALID_USER'}, status=400)
-
-            setattr(request, "user", User.objects.get(id=header['user_id']))
-            return function(view, request, *args, **kwargs)
-        except jwt.exceptions.DecodeError:
-            return JsonResponse({'MESSAGE': 'JWT_DECODE_ERROR'}, status=400)
+        return authenticate(request, function, view, args, kwargs)
     return wrapper
 
 def master_required(function):
 
-    def wrapper(view, request, *args):
-        try:
-            access_token = request.headers.get("Authorization")
-
-            if not access_token:
-                return JsonResponse({'MESSAGE':'LOGIN_REQUIRED'}, status=401)
-            
-            header = jwt.decode(
-                access_token,
-                my_settings.SECRET_KEY,
-                algorithms=my_settings.ALGORITHM
-            )
-
-            if not User.objects.filter(id=header['user_id']).exists():
-                return JsonResponse({'MESSAGE':'INVALID_USER'}, status=400)
-            
-            user = User.objects.get(id=header['user_id'])
-
-            if not user.is_master:
-                return JsonResponse({'MESSAGE':'MASTER_REQUIRED'}, status=401)
-
-            setattr(request, 'master', Master.objects.get(user=user))
-            return function(view, request, *args)
-        except jwt.exceptions.DecodeError:
-            return JsonResponse({'MESSAGE': 'JWT_DECODE_ERROR'}, status=400)
+    def wrapper(view, request, *args, **kwargs):
+        return authenticate(request, function, view, args, kwargs, master=True)
     return wrapper
 
 def query_debugger(func):
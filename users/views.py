@@ -1,35 +1,42 @@
 import json
-import bcrypt
 import jwt
 import re
-from datetime               import datetime, timedelta
+from datetime                   import datetime, timedelta
 import requests
-from secrets                import token_urlsafe 
-
-from django.http            import JsonResponse
-from django.views           import View
-from django.core            import mail
-from django.template.loader import render_to_string
-from django.utils.html      import strip_tags
-from django.db.models       import Avg, Count
-
-from my_settings            import SECRET_KEY, ALGORITHM, EMAIL
-from users.models           import User, Master, Region, SubRegion, Gender, MasterService
-from services.models        import Service, Category
-from users.utils            import (
-                                    validate_email,
-                                    validate_password,
-                                    validate_phone_number,
-                                    validate_birthdate,
-                                    validate_master,
-                                    validate_value,
-                                    login_required,
-                                    master_required,
-                                    query_debugger
-                            )
+from secrets                    import token_urlsafe
+
+from django.http                import JsonResponse
+from django.views               import View
+from django.core                import mail
+from django.template.loader     import render_to_string
+from django.utils.html          import strip_tags
+from django.db.models           import F, Case, When, Value, IntegerField, Prefetch
+from django.db.models.functions import Coalesce
+
+from my_settings                import SECRET_KEY, ALGORITHM, EMAIL
+from users.models               import User, Master, Region, SubRegion, Gender, MasterService, Review
+from users.distances            import get_distance_table
+from users.badges               import read_badges
+from users.auth                 import InvalidToken, authorize, consume_token, issue_tokens, revoke_token, revoke_tokens
+from users.hashing              import hash_password, check_password, needs_rehash
+from users.ratelimit            import rate_limit
+from services.models            import Service, Category
+from services.matching          import match_master
+from users.utils                import (
+                                        validate_email,
+                                        validate_password,
+                                        validate_phone_number,
+                                        validate_birthdate,
+                                        validate_master,
+                                        validate_value,
+                                        login_required,
+                                        master_required,
+                                        query_debugger
+                                )
                             
 class SignUpView(View):
 
+    @rate_limit('signup')
     def post(self, request):
         try:
             data     = json.loads(request.body)
@@ -46,12 +53,10 @@ class SignUpView(View):
             if not validate_email(email):
                 return JsonResponse({'MESSAGE':'INVALID_EMAIL'}, status=400)
 
-            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-
             User.objects.create(
                 name  = name,
                 email = email,
-                password = hashed_password.decode()
+                password = hash_password(password)
             )
             
             return JsonResponse({'MESSAGE':'USER_CREATED'}, status=201)
@@ -64,6 +69,7 @@ class SignUpView(View):
 
 class SignInView(View):
 
+    @rate_limit('signin')
     def post(self, request):
         try:
             data      = json.loads(request.body)
@@ -78,12 +84,38 @@ class SignInView(View):
 
             user = User.objects.get(email=email)
 
-            if not bcrypt.checkpw(password.encode('utf-8'),user.password.encode('utf-8')):
+            if not check_password(password, user.password):
                 return JsonResponse({'MESSAGE':'CHECK_PASSWORD'}, status=400)
 
-            user_token = jwt.encode({'user_id':user.id}, SECRET_KEY, algorithm=ALGORITHM)
+            if needs_rehash(user.password):
+                User.objects.filter(id=user.id).update(password=hash_password(password))
+
+            user_token, refresh_token = issue_tokens(user.id)
             
-            return JsonResponse({'MESSAGE':'SUCCESS', 'TOKEN':user_token}, status=200)
+            return JsonResponse({'MESSAGE':'SUCCESS', 'TOKEN':user_token, 'REFRESH_TOKEN':refresh_token}, status=200)
+        except json.decoder.JSONDecodeError:
+            return JsonResponse({'MESSAGE': 'JSON_DECODE_ERROR'}, status=400)
+        except KeyError:
+            return JsonResponse({'MESSAGE': 'KEY_ERROR'}, status=400)
+        except TypeError:
+            return JsonResponse({'MESSAGE': 'TYPE_ERROR'}, status=400)
+
+class TokenRefreshView(View):
+
+    def post(self, request):
+        try:
+            data              = json.loads(request.body)
+            principal, claims = authorize(data['refreshToken'], kind='refresh')
+
+            if not consume_token(claims):
+                revoke_tokens(principal.user_id)
+                return JsonResponse({'MESSAGE':'TOKEN_REVOKED'}, status=401)
+
+            user_token, refresh_token = issue_tokens(principal.user_id)
+
+            return JsonResponse({'MESSAGE':'SUCCESS', 'TOKEN':user_token, 'REFRESH_TOKEN':refresh_token}, status=200)
+        except InvalidToken as error:
+            return JsonResponse({'MESSAGE':error.message}, status=error.status)
         except json.decoder.JSONDecodeError:
             return JsonResponse({'MESSAGE': 'JSON_DECODE_ERROR'}, status=400)
         except KeyError:
@@ -91,6 +123,27 @@ class SignInView(View):
         except TypeError:
             return JsonResponse({'MESSAGE': 'TYPE_ERROR'}, status=400)
 
+class SignOutView(View):
+
+    @login_required
+    def post(self, request):
+        try:
+            data = json.loads(request.body or '{}')
+        except json.decoder.JSONDecodeError:
+            return JsonResponse({'MESSAGE': 'JSON_DECODE_ERROR'}, status=400)
+
+        revoke_token(request.token_claims)
+
+        if data.get('refreshToken'):
+            try:
+                principal, claims = authorize(data['refreshToken'], kind='refresh')
+                if principal.user_id == request.user_id:
+                    revoke_token(claims)
+            except InvalidToken:
+                pass
+
+        return JsonResponse({'MESSAGE':'SIGNED_OUT'}, status=200)
+
 class TempMasterView(View):
     
     def get(self,request):
@@ -138,6 +191,7 @@ class MasterSignUpView(View):
             user.gender       = gender
             user.is_master    = True
             user.save()
+            match_master(master.id)
 
             return JsonResponse({'MESSAGE': 'MASTER_CREATED'}, status=201)
         except json.decoder.JSONDecodeError:
@@ -193,31 +247,32 @@ class KaKaoView(View):
             url             = "https://kapi.kakao.com/v2/user/me"
             headers         = {'Authorization': f'Bearer {kakao_token}'}
             kakao_data      = requests.get(url ,headers=headers).json()
-            hashed_password = bcrypt.hashpw(token_urlsafe()[:10].encode(), bcrypt.gensalt())
+            hashed_password = hash_password(token_urlsafe()[:10])
             gender_dict     = {'male':'남자', 'female':'여자'}
             gender          = Gender.objects.get(name=gender_dict[kakao_data['kakao_account']['gender']])
             email           = kakao_data['kakao_account']['email']
 
             if User.objects.filter(email=email).exists():
                 user       = User.objects.get(email=email)
-                user_token = jwt.encode({"user_id":user.id}, SECRET_KEY, ALGORITHM)
+                user_token, refresh_token = issue_tokens(user.id)
         
-                return JsonResponse({'MESSAGE': 'SUCCESS', 'token':kakao_data}, status=200)
+                return JsonResponse({'MESSAGE': 'SUCCESS', 'token':kakao_data, 'TOKEN':user_token, 'REFRESH_TOKEN':refresh_token}, status=200)
 
             user = User.objects.create(
                 email    = kakao_data['kakao_account']['email'],
                 name     = kakao_data['kakao_account']['profile']['nickname'],
                 gender   = gender,
-                password = hashed_password.decode()
+                password = hashed_password
             )
-            user_token = jwt.encode({"user_id":user.id}, SECRET_KEY, ALGORITHM)
+            user_token, refresh_token = issue_tokens(user.id)
         
-            return JsonResponse({'MESSAGE': 'SUCCESS', 'token':kakao_data}, status=200)
+            return JsonResponse({'MESSAGE': 'SUCCESS', 'token':kakao_data, 'TOKEN':user_token, 'REFRESH_TOKEN':refresh_token}, status=200)
         except json.decoder.JSONDecodeError:
             return JsonResponse({'MESSAGE': 'JSON_DECODE_ERROR'}, status=400)
 
 class PasswordResetView(View):
 
+    @rate_limit('password_reset')
     def post(self, request):
         try:
             data  = json.loads(request.body)
@@ -301,8 +356,9 @@ class PasswordResetView(View):
                 return JsonResponse({'MESSAGE': 'LINK_EXPIRED'}, status=400)
 
             user          = User.objects.get(id=decoded_token['user_id'])
-            user.password = bcrypt.hashpw(password['resetPassword'].encode(), bcrypt.gensalt()).decode()
+            user.password = hash_password(password['resetPassword'])
             user.save()
+            revoke_tokens(user.id)
 
             return JsonResponse({'MESSAGE': 'PASSWORD_CHANGED'}, status=200)
         except json.decoder.JSONDecodeError:
@@ -321,17 +377,34 @@ class ProfileListView(View):
         sort_method = request.GET.get('sorted_by','id')
         limit       = validate_value(int(request.GET.get('limit',20)))
         offset      = validate_value(int(request.GET.get('offset',0))) 
+        near        = request.GET.get('near')
         masters     = Master.objects.select_related('user')\
-                                    .prefetch_related('review_set')\
-                                    .annotate(avg=Avg('review__rating'),cnt=Count('review'))\
-                                    .order_by(sort_method)[offset:offset+limit]
+                                    .prefetch_related(Prefetch(
+                                        'review_set',
+                                        queryset = Review.objects.only('id', 'master_id', 'content').order_by('id'),
+                                        to_attr  = 'review_list',
+                                    ))\
+                                    .annotate(avg=F('stats__rating_avg'),cnt=Coalesce('stats__review_count', 0))
+
+        if near:
+            if not near.isdigit():
+                return JsonResponse({'MESSAGE':'INVALID_SUBREGION'}, status=400)
+
+            nearby    = get_distance_table().nearby(int(near))
+            masters   = masters.annotate(proximity=Case(
+                *[When(subregions_id=subregion_id, then=Value(points)) for subregion_id, points in nearby.items()],
+                default      = Value(0),
+                output_field = IntegerField(),
+            )).order_by('-proximity', sort_method)[offset:offset+limit]
+        else:
+            masters   = masters.order_by(sort_method)[offset:offset+limit]
         master_list = [{
             'id'           : master.id,
             'name'         : master.user.name,
             'introduction' : master.introduction if master.introduction else "",
             'rating'       : round(float(master.avg),1) if master.avg else 0,
             'reviewCount' : master.cnt,
-            'review'       : master.review_set.all()[0].content if master.review_set.exists() else "",
+            'review'       : master.review_list[0].content if master.review_list else "",
             'profileImg'  : master.user.profile_image
         } for master in masters ]
 
@@ -349,7 +422,7 @@ class ProfileDetailView(View):
         try:
             master = Master.objects.select_related('subregions__region')\
                                     .prefetch_related('masterservice_set__service','master_payments')\
-                                    .annotate(avg=Avg('review__rating'))\
+                                    .annotate(avg=F('stats__rating_avg'))\
                                     .get(id=master_id)
 
             req_dict = [{    
@@ -400,6 +473,7 @@ class ProfileMainServiceView(View):
             master_service         = master.masterservice_set.get(service=service)
             master_service.is_main = True
             master_service.save()
+            match_master(master.id)
             
             return JsonResponse({'MESSAGE': 'MAIN_SERVICE_CHANGED'}, status=200)
         except Service.DoesNotExist:
@@ -452,3 +526,11 @@ class ProfileDescriptionView(View):
             return JsonResponse({'MESSAGE': 'DESCRIPTION_CHANGED'}, status=200)
         except KeyError:
             return JsonResponse({'MESSAGE': 'KEY_ERROR'}, status=400)
+
+class BadgeView(View):
+
+    @login_required
+    def get(self, request):
+        badge = read_badges(request.user_id)
+
+        return JsonResponse({'newRequests': badge['new_requests'], 'newQuotations': badge['new_quotations']}, status=200)